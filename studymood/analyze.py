@@ -0,0 +1,86 @@
+import argparse
+import csv
+import time
+from collections import deque
+
+from src.capture import iter_video_frames
+from src.mood import iter_detect_moods
+from src.recommender import TaskRecommender
+
+# Same cadence as the Dashboard, measured in video time
+SUGGESTION_INTERVAL = 120
+
+
+def analyze_video(path, output, stride=15, workers=None, chunksize=8, backend=None):
+    recommender = TaskRecommender()
+    meta = deque()
+    read = {"frames": 0}
+
+    def frames():
+        reader = iter_video_frames(path, stride)
+        while True:
+            try:
+                index, seconds, frame = next(reader)
+            except StopIteration as done:
+                read["frames"] = done.value
+                return
+            meta.append((index, seconds))
+            yield frame
+
+    samples = 0
+    last_suggestion = None
+    start = time.perf_counter()
+
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["frame", "seconds", "mood", "focus", "suggestion"])
+
+        for mood, focus in iter_detect_moods(frames(), workers=workers, chunksize=chunksize, backend=backend):
+            index, seconds = meta.popleft()
+            # No keyboard/mouse activity offline, so focus is the face score alone
+            focus = round(focus, 2)
+
+            # Video time stands in for wall-clock time in the recommender's window
+            recommender.update(int(seconds * 1e9), mood, focus)
+            suggestion = ""
+            if last_suggestion is None or seconds - last_suggestion >= SUGGESTION_INTERVAL:
+                suggestion = recommender.recommend()
+                last_suggestion = seconds
+
+            writer.writerow([index, f"{seconds:.2f}", mood, focus, suggestion])
+            samples += 1
+
+            if samples % 500 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{samples} samples, {seconds / 60:.1f} min of video, {samples / elapsed:.1f} samples/s")
+
+    elapsed = time.perf_counter() - start
+    return {
+        "samples": samples,
+        "frames": read["frames"],
+        "seconds": elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a recorded study session through the mood/focus pipeline.")
+    parser.add_argument("video", help="video file to analyse")
+    parser.add_argument("-o", "--output", help="timeline CSV to write (default: <video>.timeline.csv)")
+    parser.add_argument("--stride", type=int, default=15, help="analyse every Nth frame (default: 15)")
+    parser.add_argument("--workers", type=int, default=None, help="detector processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=8, help="frames sent to a worker at a time")
+    parser.add_argument("--backend", help="detector backend: haar, haar-fast or dnn (default: $STUDYMOOD_BACKEND or haar)")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"{args.video}.timeline.csv"
+    result = analyze_video(args.video, output, stride=args.stride,
+                           workers=args.workers, chunksize=args.chunksize, backend=args.backend)
+
+    elapsed = max(result["seconds"], 1e-9)
+    print(f"Wrote {result['samples']} samples to {output}")
+    print(f"Processed {result['frames']} frames in {elapsed:.1f}s "
+          f"({result['frames'] / elapsed:.1f} frames/s, {result['samples'] / elapsed:.1f} analysed/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,289 +1,93 @@
-import streamlit as st
-import cv2
 import time
+_run_start = time.perf_counter()
+
+import streamlit as st
+import os
 import numpy as np
-import pandas as pd
 from datetime import datetime
 
-# Try to import OpenCV with fallback
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
-
-# Import your custom modules with fallbacks
-try:
-    from src.mood import MoodDetector
-    from src.focus import FocusLogger
-    from src.recommender import TaskRecommender
-    MODULES_AVAILABLE = True
-except ImportError as e:
-    MODULES_AVAILABLE = False
-    # Create demo versions for cloud deployment
-    class DemoMoodDetector:
-        def __init__(self):
-            self.moods = ["Happy", "Neutral", "Serious", "Focused"]
-            self.current_mood_index = 0
-        
-        def detect_mood(self, frame=None):
-            # Cycle through moods for demo purposes
-            mood = self.moods[self.current_mood_index]
-            self.current_mood_index = (self.current_mood_index + 1) % len(self.moods)
-            
-            # Simulate focus score
-            focus = np.random.uniform(0.3, 0.9)
-            return mood, focus
+# OpenCV, pandas, the Haar cascades and the input listeners are heavy, so they
+# load on the pages and at the session start that need them, not on every run
+from src.recommender import RULES, TaskRecommender
+from src.store import SampleStore, local_index
+from src.sessionlog import SessionLogWriter, load_history, new_log_path
+from src.export import MIME_TYPES, available_formats, read_session, session_bytes
+from src.recording import new_recording_path
+from src.aggregates import SessionAggregates
+from src.rollups import RollupSeries, lttb
+from src.hub import AnalysisHub
+from src.scheduler import DeadlineScheduler
+from src.perf import PERF, LatencyHistogram
+from src.viewmodel import ViewModel
+
+# Demo versions for cloud deployment, used when the camera modules can't load
+class DemoMoodDetector:
+    def __init__(self, **kwargs):
+        self.moods = ["Happy", "Neutral", "Serious", "Focused"]
+        self.current_mood_index = 0
+        self.face_source = None
     
-    class DemoFocusLogger:
-        def get_focus_score(self):
-            # Simulate activity-based focus
-            return np.random.uniform(0.4, 0.8)
-    
-    class DemoTaskRecommender:
-        def suggest(self, mood, focus):
-            if focus < 0.3:
-                return "Take a 5-min break, stretch and relax."
-            if mood == "Sad" or mood == "sad":
-                return "Do an easy/creative task to lift mood."
-            if mood == "Happy" and focus > 0.6:
-                return "Great time for deep work (Pomodoro 25m)."
-            return "Continue with medium tasks and stay consistent."
-    
-    # Use demo versions
-    MoodDetector = DemoMoodDetector
-    FocusLogger = DemoFocusLogger
-    TaskRecommender = DemoTaskRecommender
+    def detect_mood(self, frame=None):
+        # Cycle through moods for demo purposes
+        mood = self.moods[self.current_mood_index]
+        self.current_mood_index = (self.current_mood_index + 1) % len(self.moods)
+        
+        # Simulate focus score
+        focus = np.random.uniform(0.3, 0.9)
+        return mood, focus
+
+class DemoFocusLogger:
+    def get_focus_score(self):
+        # Simulate activity-based focus
+        return np.random.uniform(0.4, 0.8)
 
 st.set_page_config(page_title="StudyMood", layout="wide", page_icon="🎯")
 
-# CSS embedded directly in the app
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-* {
-    font-family: 'Inter', sans-serif;
-}
-
-.stApp {
-    background: linear-gradient(135deg, #f8fafc 0%, #f1f5f9 50%, #ffffff 100%) !important;
-}
-
-.main-header {
-    font-size: 2.8rem !important;
-    background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 50%, #d53f8c 100%);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-    text-align: center;
-    margin-bottom: 1.5rem;
-    font-weight: 700;
-    text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-}
-
-.page-header {
-    font-size: 2.2rem !important;
-    background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 100%);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-    margin-bottom: 2rem;
-    font-weight: 600;
-}
-
-.metric-card {
-    background: #ffffff !important;
-    padding: 1.5rem;
-    border-radius: 16px;
-    border: 2px solid #e2e8f0 !important;
-    box-shadow: 0 4px 20px rgba(90, 103, 216, 0.12) !important;
-    margin: 1rem 0;
-    transition: all 0.3s ease;
-    color: #2d3748 !important;
-    position: relative;
-    overflow: hidden;
-}
-
-.metric-card::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    width: 4px;
-    height: 100%;
-    background: linear-gradient(135deg, #5a67d8, #6b46c1);
-}
-
-.metric-card:hover {
-    transform: translateY(-3px);
-    box-shadow: 0 8px 30px rgba(90, 103, 216, 0.18) !important;
-    border-color: #cbd5e0 !important;
-}
-
-.metric-card h1,
-.metric-card h2,
-.metric-card h3,
-.metric-card h4,
-.metric-card h5,
-.metric-card h6,
-.metric-card p,
-.metric-card span,
-.metric-card div {
-    color: #2d3748 !important;
-}
-
-.suggestion-box {
-    background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 100%) !important;
-    color: #ffffff !important;
-    padding: 2rem;
-    border-radius: 16px;
-    margin: 1.5rem 0;
-    box-shadow: 0 8px 25px rgba(90, 103, 216, 0.3) !important;
-    border: 2px solid #4c51bf !important;
-    animation: fadeIn 0.8s ease-in;
-    position: relative;
-}
-
-.suggestion-box h1,
-.suggestion-box h2,
-.suggestion-box h3,
-.suggestion-box h4,
-.suggestion-box h5,
-.suggestion-box h6,
-.suggestion-box p,
-.suggestion-box span {
-    color: #ffffff !important;
-    text-shadow: 0 1px 2px rgba(0,0,0,0.2);
-}
-
-.session-card {
-    background: linear-gradient(135deg, #fed7d7 0%, #feebc8 100%) !important;
-    color: #2d3748 !important;
-    padding: 1.5rem;
-    border-radius: 16px;
-    margin: 1rem 0;
-    box-shadow: 0 4px 20px rgba(237, 137, 54, 0.15) !important;
-    border: 2px solid #fbd38d !important;
-}
-
-.session-card h1,
-.session-card h2,
-.session-card h3,
-.session-card h4,
-.session-card h5,
-.session-card h6,
-.session-card p,
-.session-card span {
-    color: #2d3748 !important;
-}
-
-.focus-bar {
-    height: 16px;
-    background: linear-gradient(90deg, #e53e3e, #ed8936, #48bb78, #38a169) !important;
-    border-radius: 10px;
-    margin: 0.8rem 0;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.15);
-    border: 1px solid #cbd5e0;
-}
-
-.stButton button {
-    background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 100%) !important;
-    color: #ffffff !important;
-    border: 2px solid #4c51bf !important;
-    border-radius: 12px;
-    padding: 0.8rem 1.5rem;
-    font-weight: 600;
-    transition: all 0.3s ease;
-    box-shadow: 0 4px 15px rgba(90, 103, 216, 0.25) !important;
-    text-shadow: 0 1px 2px rgba(0,0,0,0.2);
-}
-
-.stButton button:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 8px 25px rgba(90, 103, 216, 0.4) !important;
-    background: linear-gradient(135deg, #6b46c1 0%, #5a67d8 100%) !important;
-    border-color: #5a67d8 !important;
-    color: #ffffff !important;
-}
-
-.stRadio > div {
-    background: #ffffff !important;
-    padding: 1rem;
-    border-radius: 12px;
-    box-shadow: 0 2px 12px rgba(0,0,0,0.08) !important;
-    color: #2d3748 !important;
-    border: 2px solid #e2e8f0;
-}
-
-.stRadio label {
-    color: #2d3748 !important;
-    font-weight: 500;
-}
-
-section[data-testid="stSidebar"] {
-    background: linear-gradient(180deg, #ffffff 0%, #f7fafc 100%) !important;
-    border-right: 2px solid #e2e8f0 !important;
-}
-
-section[data-testid="stSidebar"] * {
-    color: #2d3748 !important;
-}
-
-.stMetric {
-    background: #ffffff !important;
-    padding: 1rem;
-    border-radius: 12px;
-    box-shadow: 0 2px 12px rgba(0,0,0,0.08) !important;
-    color: #2d3748 !important;
-    border: 2px solid #e2e8f0;
-}
-
-.stMetric label, .stMetric div {
-    color: #2d3748 !important;
-    font-weight: 500;
-}
-
-@keyframes fadeIn {
-    from { 
-        opacity: 0; 
-        transform: translateY(20px); 
-    }
-    to { 
-        opacity: 1; 
-        transform: translateY(0); 
-    }
-}
-
-.mood-emoji {
-    font-size: 3rem;
-    text-align: center;
-    margin: 1rem 0;
-    filter: drop-shadow(0 2px 4px rgba(0,0,0,0.1));
-}
-
-.divider {
-    height: 3px;
-    background: linear-gradient(90deg, transparent, #5a67d8, #6b46c1, transparent);
-    margin: 2rem 0;
-    border: none;
-    border-radius: 2px;
-}
-
-.stMarkdown, 
-.stText, 
-.stTitle, 
-.stHeader, 
-.stSubheader,
-.stAlert,
-.stInfo,
-.stSuccess,
-.stWarning,
-.stError {
-    color: #2d3748 !important;
-}
-</style>
-""", unsafe_allow_html=True)
+# Loop timing: analysis and preview pull the newest frame at their own rates
+ANALYSIS_INTERVAL = 0.5
+
+# Upper bound on points sent to the browser for trend charts
+CHART_POINTS = 500
+
+# Every session is also appended to an on-disk log so history survives restarts
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SESSION_DIR = os.path.join(APP_DIR, "sessions")
+
+# Preview encodings offered in the sidebar (see src.preview.FORMATS)
+PREVIEW_FORMATS = ["jpeg", "webp"]
+
+# Face/expression detector backends (see src.backends.BACKENDS); dnn needs
+# ONNX models in studymood/models/. STUDYMOOD_BACKEND sets the default.
+DETECTOR_BACKENDS = ["haar", "haar-fast", "dnn"]
+DEFAULT_DETECTOR = os.environ.get("STUDYMOOD_BACKEND", "haar")
+
+# Stylesheet is read once per process and re-injected on each rerun
+@st.cache_resource
+def load_css():
+    with open(os.path.join(APP_DIR, "styles.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# The first run in a process pays for the imports; later runs are reruns
+@st.cache_resource
+def get_run_timings():
+    return {"cold_start": None, "reruns": LatencyHistogram()}
+
+_run_recorded = False
+
+def record_run_time():
+    """Record time from the top of the script to the page being drawn, once per run."""
+    global _run_recorded
+    if _run_recorded:
+        return
+    _run_recorded = True
+    elapsed = time.perf_counter() - _run_start
+    timings = get_run_timings()
+    if timings["cold_start"] is None:
+        timings["cold_start"] = elapsed
+    else:
+        timings["reruns"].record(elapsed)
 
 # Session state
 if 'session_active' not in st.session_state:
@@ -292,8 +96,57 @@ if 'last_suggestion_time' not in st.session_state:
     st.session_state.last_suggestion_time = None
 if 'current_suggestion' not in st.session_state:
     st.session_state.current_suggestion = "🌟 Start your study session to get personalized recommendations!"
-if 'session_data' not in st.session_state:
-    st.session_state.session_data = []
+if 'samples' not in st.session_state:
+    st.session_state.samples = SampleStore()
+if 'aggregates' not in st.session_state:
+    st.session_state.aggregates = SessionAggregates()
+if 'rollups' not in st.session_state:
+    st.session_state.rollups = RollupSeries()
+if 'session_log' not in st.session_state:
+    st.session_state.session_log = None
+if 'subscription' not in st.session_state:
+    st.session_state.subscription = None
+if 'recording' not in st.session_state:
+    st.session_state.recording = None
+# Recommendations come from a window over this session's samples, so each session has its own
+if 'recommender' not in st.session_state:
+    st.session_state.recommender = TaskRecommender()
+
+# Camera, detector (parsed cascades) and listeners are built when the first
+# session starts; the hub keeps them across reruns
+def load_components():
+    try:
+        from src.mood import MoodDetector
+        from src.focus import FocusLogger
+        from src.camera import CameraManager
+        return CameraManager(), MoodDetector(tracking=True), FocusLogger()
+    except ImportError as e:
+        print(f"Analysis modules not available, using demo versions: {e}")
+        return None, DemoMoodDetector(), DemoFocusLogger()
+
+# One capture/analysis loop shared by every browser session: the headless daemon
+# (daemon.py) when it's running, otherwise a hub inside this process.
+# STUDYMOOD_DAEMON=host:port points at another daemon, "off" skips it. A daemon
+# that went away is dropped on the next run, falling back to an in-process hub.
+def hub_alive(hub):
+    return hub.alive() if hasattr(hub, "alive") else True
+
+@st.cache_resource(validate=hub_alive)
+def get_analysis_hub():
+    address = os.environ.get("STUDYMOOD_DAEMON", "localhost:6099")
+    if address != "off":
+        from src.ipc import RemoteHub
+        hub = RemoteHub.connect_to(address)
+        if hub is not None:
+            return hub
+    return AnalysisHub(load_components, interval=ANALYSIS_INTERVAL)
+
+analysis_hub = get_analysis_hub()
+
+def on_detector_change():
+    selected = st.session_state.detector_backend
+    active = analysis_hub.set_detector_backend(selected)
+    st.session_state.detector_fallback = (selected, active) if active is not None and active != selected else None
 
 # Sidebar navigation
 with st.sidebar:
@@ -313,7 +166,7 @@ with st.sidebar:
     st.markdown("**✨ Navigate to:**")
     page = st.radio(
         "",
-        ["Dashboard", "Mood Analysis", "Focus Tracking", "Recommendations"],
+        ["Dashboard", "Mood Analysis", "Focus Tracking", "Recommendations", "Performance"],
         key="nav",
         label_visibility="collapsed"
     )
@@ -322,17 +175,35 @@ with st.sidebar:
     st.markdown("### 🎬 Session Control")
     
     if not st.session_state.session_active:
+        st.checkbox("⏺️ Record for replay", key="record_session",
+                    help="Save the analysed frames and input timing to sessions/ so replay.py can rerun them")
         if st.button("🚀 Start Session", use_container_width=True, key="start_btn"):
             st.session_state.session_active = True
             st.session_state.session_start = datetime.now()
             st.session_state.last_suggestion_time = datetime.now()
-            st.session_state.session_data = []
+            st.session_state.samples = SampleStore()
+            st.session_state.aggregates = SessionAggregates()
+            st.session_state.rollups = RollupSeries()
+            st.session_state.recommender = TaskRecommender()
+            st.session_state.session_log = SessionLogWriter(new_log_path(SESSION_DIR))
+            # The hub starts recording when this session subscribes
+            st.session_state.recording = new_recording_path(SESSION_DIR) if st.session_state.record_session else None
             st.session_state.current_suggestion = "🎉 Session started! Tracking your mood and focus..."
             st.rerun()
     else:
         if st.button("⏹️ Stop Session", use_container_width=True, key="stop_btn"):
             st.session_state.session_active = False
             st.session_state.current_suggestion = "🏁 Session ended. Start a new session to continue tracking!"
+            # The hub releases the camera once no session is subscribed
+            if st.session_state.subscription is not None:
+                st.session_state.subscription.close()
+                st.session_state.subscription = None
+            if st.session_state.session_log is not None:
+                st.session_state.session_log.close()
+                st.session_state.session_log = None
+            if st.session_state.recording is not None:
+                analysis_hub.stop_recording(st.session_state.recording)
+                st.session_state.recording = None
             st.rerun()
     
     # Session info in sidebar
@@ -341,13 +212,37 @@ with st.sidebar:
         duration = datetime.now() - st.session_state.session_start
         minutes = duration.seconds // 60
         st.metric("⏱️ Session Time", f"{minutes} minutes")
+        if st.session_state.recording is not None:
+            st.caption(f"⏺️ Recording to {os.path.basename(st.session_state.recording)}")
 
-# Initialize components
-@st.cache_resource
-def load_components():
-    return MoodDetector(), FocusLogger(), TaskRecommender()
-
-mood_detector, focus_logger, recommender = load_components()
+    if page in ("Mood Analysis", "Focus Tracking"):
+        st.markdown("---")
+        sources = ["Current session", "Saved history", "Imported file"]
+        # A daemon keeps statistics for everything it analysed, with or without a tab open
+        if hasattr(analysis_hub, "aggregates"):
+            sources.append("Daemon (since it started)")
+        st.radio("📂 Data source", sources, key="data_source")
+        if st.session_state.data_source == "Imported file":
+            st.file_uploader("Session export", type=["npz", "parquet"], key="import_file",
+                             help="An .npz or .parquet file from the export button or export.py")
+
+    if page == "Dashboard":
+        st.markdown("---")
+        with st.expander("🖼️ Preview Settings"):
+            st.slider("Width (px)", 240, 960, 480, step=40, key="preview_width")
+            st.slider("Quality", 30, 95, 70, key="preview_quality")
+            st.slider("Frames per second", 1, 15, 5, key="preview_fps")
+            st.selectbox("Format", PREVIEW_FORMATS, key="preview_format")
+        with st.expander("🧠 Detector"):
+            # The detector is shared (maybe by a daemon), so show what it runs and
+            # only switch it when this selectbox is changed
+            running_backend = analysis_hub.detector_info()["backend"]
+            if running_backend in DETECTOR_BACKENDS:
+                st.session_state.detector_backend = running_backend
+            elif "detector_backend" not in st.session_state:
+                st.session_state.detector_backend = DEFAULT_DETECTOR if DEFAULT_DETECTOR in DETECTOR_BACKENDS else "haar"
+            st.selectbox("Backend", DETECTOR_BACKENDS, key="detector_backend", on_change=on_detector_change,
+                         help="Shared by every session. haar-fast trades accuracy for CPU on slow machines.")
 
 # Mood emoji mapping
 def get_mood_emoji(mood):
@@ -370,20 +265,124 @@ def get_focus_level(focus_score):
     else:
         return "Low Focus 😴", "#ef4444"
 
+# Dashboard cards; the loop only re-sends one when its HTML changes (see ViewModel)
+def suggestion_html(suggestion):
+    return f'''
+    <div class="suggestion-box">
+        <h3>✨ Smart Suggestion</h3>
+        <p style="font-size: 1.2rem;">{suggestion}</p>
+    </div>
+    '''
+
+def mood_card_html(mood):
+    return f"""
+    <div class='metric-card'>
+        <div class='mood-emoji'>{get_mood_emoji(mood)}</div>
+        <h3>Current Mood</h3>
+        <h2 style='color: #5a67d8;'>{mood}</h2>
+    </div>
+    """
+
+def focus_card_html(focus):
+    focus_text, focus_color = get_focus_level(focus)
+    return f"""
+    <div class='metric-card'>
+        <h3>Focus Level</h3>
+        <h2 style='color: {focus_color};'>{focus_text}</h2>
+        <p>Score: {focus}/1.0</p>
+        <div class='focus-bar' style='width: {focus * 100}%'></div>
+    </div>
+    """
+
+def timer_card_html(minutes):
+    return f"""
+    <div class='session-card'>
+        <h3>⏱️ Session Timer</h3>
+        <h2>{minutes} minutes</h2>
+        <p>Stay focused! 💫</p>
+    </div>
+    """
+
+# Samples and running stats for the analysis pages: this session, every saved session
+# log, an imported file, or the daemon's running stats (no samples to chart there)
+def get_analysis_data():
+    source = st.session_state.get("data_source")
+    if source == "Daemon (since it started)":
+        return SampleStore(), analysis_hub.aggregates()
+    if source == "Saved history":
+        samples = load_history(SESSION_DIR)
+        return samples, SessionAggregates.from_store(samples)
+    if source == "Imported file":
+        return get_imported_data()
+    return st.session_state.samples, st.session_state.aggregates
+
+# An uploaded export is parsed once and kept until another file is chosen
+def get_imported_data():
+    uploaded = st.session_state.get("import_file")
+    if uploaded is None:
+        samples = SampleStore()
+        return samples, SessionAggregates.from_store(samples)
+    key = (uploaded.name, uploaded.size)
+    cached = st.session_state.get("imported")
+    if cached is None or cached[0] != key:
+        try:
+            samples = read_session(uploaded)
+        except Exception as e:
+            st.error(f"Couldn't read {uploaded.name}: {e}")
+            samples = SampleStore()
+        cached = (key, samples, SessionAggregates.from_store(samples))
+        st.session_state.imported = cached
+    return cached[1], cached[2]
+
+# Export of the samples on screen: the file is only built when asked for, and offered
+# for download until the samples change
+def render_export_button(samples):
+    formats = available_formats()
+    fmt = formats[0]
+    if len(formats) > 1:
+        fmt = st.sidebar.selectbox("💾 Export format", formats, key="export_format")
+    last = samples.last()
+    key = (st.session_state.get("data_source"), len(samples), last[0] if last else None, fmt)
+    cached = st.session_state.get("export_cache")
+    if cached is None or cached[0] != key:
+        if not st.sidebar.button("📦 Prepare export", key="prepare_export", disabled=len(samples) == 0):
+            return
+        cached = (key, session_bytes(samples, fmt))
+        st.session_state.export_cache = cached
+    stamp = datetime.fromtimestamp(last[0] / 1e9).strftime("-%Y%m%d-%H%M%S") if last else ""
+    st.sidebar.download_button("⬇️ Export samples", cached[1], file_name=f"studymood{stamp}.{fmt}",
+                               mime=MIME_TYPES[fmt], disabled=len(samples) == 0)
+
+# Downsampled focus trend: rollup tiers for the live session, LTTB over history
+def get_focus_trend(samples):
+    if st.session_state.get("data_source") != "Current session":
+        timestamps, values = lttb(samples.timestamps, samples.focus, CHART_POINTS)
+    else:
+        timestamps, values = st.session_state.rollups.series(CHART_POINTS)
+    import pandas as pd
+    return pd.DataFrame({"focus": values}, index=local_index(timestamps))
+
+def get_detector_cost_text():
+    info = analysis_hub.detector_info()
+    if info["cost"] is None:
+        return ""
+    return f" · {info['backend']} {info['cost'] * 1000:.1f} ms/frame, {info['skip_ratio']:.0%} skipped"
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m {seconds}s"
+
 # Camera initialization function
 def initialize_camera():
     """Initialize camera with cloud compatibility"""
     try:
-        # Try different camera indices for cloud compatibility
-        for camera_index in [0, 1, 2]:
-            camera = cv2.VideoCapture(camera_index)
-            if camera.isOpened():
-                # Test if camera can read frames
-                ret, frame = camera.read()
-                if ret:
-                    st.success(f"✅ Camera {camera_index} initialized successfully!")
-                    return camera
-                camera.release()
+        device_index = analysis_hub.acquire_camera()
+        if device_index is not None:
+            st.success(f"✅ Camera {device_index} initialized successfully!")
+            return device_index
         
         st.warning("⚠️ No functional camera found. The app will run with simulated camera feed.")
         return None
@@ -418,23 +417,25 @@ if page == "Dashboard":
         
     else:
         # Active session
+        from src.buffers import placeholder_frame
+        from src.preview import PreviewEncoder
+
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.markdown("### 📹 Live Camera Feed")
             
-            # Initialize camera
+            # Initialize camera (reuses the open device across reruns)
             camera = initialize_camera()
+            if st.session_state.get("detector_fallback"):
+                selected_backend, active_backend = st.session_state.detector_fallback
+                st.warning(f"⚠️ The {selected_backend} detector isn't available here, using {active_backend}.")
             FRAME_WINDOW = st.image([])
             
             if camera is None:
-                # Create a static informational frame
-                static_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(static_frame, "Camera Not Available", (150, 200), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                cv2.putText(static_frame, "Running in Analysis Mode", (120, 250), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                FRAME_WINDOW.image(static_frame)
+                # Static informational frame, drawn once per process
+                FRAME_WINDOW.image(placeholder_frame(("Camera Not Available", (150, 200), 1),
+                                                     ("Running in Analysis Mode", (120, 250), 0.7)))
 
         with col2:
             st.markdown("### 📈 Live Metrics")
@@ -450,121 +451,123 @@ if page == "Dashboard":
         st.markdown("### 💫 Current Recommendation")
         suggestion_box = st.empty()
         
-        with suggestion_box.container():
-            st.markdown(f'''
-            <div class="suggestion-box">
-                <h3>✨ Smart Suggestion</h3>
-                <p style="font-size: 1.2rem;">{st.session_state.current_suggestion}</p>
-            </div>
-            ''', unsafe_allow_html=True)
+        # Placeholders start empty on every rerun, so so does the record of what they show
+        view = ViewModel()
+        view.markdown("suggestion", suggestion_box, suggestion_html(st.session_state.current_suggestion))
+
+        mood, total_focus = "Neutral", 0.0
+
+        # The preview is downscaled and encoded at its own rate; analysis keeps the full frame
+        preview = PreviewEncoder(
+            width=st.session_state.get("preview_width", 480),
+            quality=st.session_state.get("preview_quality", 70),
+            fmt=st.session_state.get("preview_format", "jpeg"),
+            fps=None,
+        )
+        ui_scheduler = DeadlineScheduler()
+        ui_scheduler.add_stage("ui", 1.0 / st.session_state.get("preview_fps", 5))
+        with col1:
+            preview_stats = st.empty()
+
+        # Capture and analysis happen once in the shared hub; this tab only reads results
+        if st.session_state.subscription is None:
+            st.session_state.subscription = analysis_hub.subscribe()
+            if st.session_state.recording is not None:
+                st.session_state.recording = analysis_hub.start_recording(st.session_state.recording)
+        subscription = st.session_state.subscription
+        record_run_time()
 
         # Main monitoring loop
         while st.session_state.session_active:
-            # Handle camera frame
-            if camera and camera.isOpened():
-                ret, frame = camera.read()
-                if not ret:
-                    # Camera failed, create a placeholder
-                    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(frame, "Camera Feed Unavailable", (120, 240), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+            # Handle camera frame (capture runs on its own thread, we only see the newest frame)
+            if camera is not None:
+                frame = subscription.latest_frame()
+                if frame is None:
+                    # Camera failed, show the cached placeholder
+                    frame = placeholder_frame(("Camera Feed Unavailable", (120, 240), 0.8))
             else:
-                # No camera, create analysis mode frame
-                frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(frame, "Study Analysis Mode", (160, 220), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                cv2.putText(frame, "Tracking Focus & Activity", (140, 260), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-            # Detect metrics (mood detector will handle no-face scenarios)
-            mood, face_focus = mood_detector.detect_mood(frame)
-            activity_focus = focus_logger.get_focus_score()
-            total_focus = round((face_focus * 0.6 + activity_focus * 0.4), 2)
-            
-            # Store session data
-            st.session_state.session_data.append({
-                'timestamp': datetime.now(),
-                'mood': mood,
-                'focus': total_focus
-            })
-
-            # Update suggestion every 2 minutes
-            current_time = datetime.now()
-            if (st.session_state.last_suggestion_time is None or 
-                (current_time - st.session_state.last_suggestion_time).seconds >= 120):
-                
-                new_suggestion = recommender.suggest(mood, total_focus)
-                st.session_state.current_suggestion = new_suggestion
-                st.session_state.last_suggestion_time = current_time
-                
-                # Update the suggestion box
-                with suggestion_box.container():
-                    st.markdown(f'''
-                    <div class="suggestion-box">
-                        <h3>✨ Smart Suggestion</h3>
-                        <p style="font-size: 1.2rem;">{st.session_state.current_suggestion}</p>
-                    </div>
-                    ''', unsafe_allow_html=True)
-
-            # Update real-time metrics
-            with col2:
-                with mood_placeholder.container():
-                    mood_emoji = get_mood_emoji(mood)
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <div class='mood-emoji'>{mood_emoji}</div>
-                        <h3>Current Mood</h3>
-                        <h2 style='color: #5a67d8;'>{mood}</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
+                # No camera, analysis mode frame (cached, the preview draws on its own copy)
+                frame = placeholder_frame(("Study Analysis Mode", (160, 220), 1),
+                                          ("Tracking Focus & Activity", (140, 260), 0.7))
+
+            # Every subscribed tab sees the same samples; waiting here paces the loop
+            sample = subscription.next(timeout=ui_scheduler.time_until_next())
+            if not getattr(analysis_hub, "connected", True):
+                # The daemon is gone: rerun to pick up a new hub and subscribe to it
+                st.session_state.subscription = None
+                st.rerun()
+            if sample is not None:
+                current_time = datetime.now()
+                mood, total_focus = sample.mood, sample.focus
                 
-                with focus_placeholder.container():
-                    focus_text, focus_color = get_focus_level(total_focus)
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <h3>Focus Level</h3>
-                        <h2 style='color: {focus_color};'>{focus_text}</h2>
-                        <p>Score: {total_focus}/1.0</p>
-                        <div class='focus-bar' style='width: {total_focus * 100}%'></div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                # Store session data
+                timestamp = sample.timestamp_ns
+                st.session_state.samples.append(timestamp, mood, total_focus)
+                st.session_state.aggregates.update(timestamp, mood, total_focus)
+                st.session_state.rollups.add(timestamp, total_focus)
+                st.session_state.recommender.update(timestamp, mood, total_focus)
+                if st.session_state.session_log is not None:
+                    st.session_state.session_log.append(timestamp, mood, total_focus)
+
+                # Update suggestion every 2 minutes
+                if (st.session_state.last_suggestion_time is None or 
+                    (current_time - st.session_state.last_suggestion_time).seconds >= 120):
+                    
+                    new_suggestion = st.session_state.recommender.recommend()
+                    st.session_state.current_suggestion = new_suggestion
+                    st.session_state.last_suggestion_time = current_time
+                    view.markdown("suggestion", suggestion_box, suggestion_html(new_suggestion))
+
+                # Update real-time metrics; unchanged cards aren't sent again
+                metrics_start = time.perf_counter()
+                minutes = (current_time - st.session_state.session_start).seconds // 60
+                view.markdown("mood", mood_placeholder, mood_card_html(mood))
+                view.markdown("focus", focus_placeholder, focus_card_html(total_focus))
+                view.markdown("timer", timer_placeholder, timer_card_html(minutes))
+                PERF.record("ui.metrics", time.perf_counter() - metrics_start)
+
+                try:
+                    rates = analysis_hub.rates()
+                except ConnectionError:
+                    rates = {}
+                rates.update(ui_scheduler.rates())
+                rate_text = " · ".join(f"{name} {r['achieved_hz']:.1f}/{r['target_hz']:.1f} Hz"
+                                       for name, r in rates.items() if name != "capture")
+                view.caption("preview_stats", preview_stats,
+                             f"Preview: {preview.bytes_per_second() / 1024:.1f} KB/s, "
+                             f"{preview.frames_sent} sent, {preview.frames_skipped} unchanged · {rate_text}"
+                             f"{get_detector_cost_text()}")
+
+            # Overlay is drawn on the downscaled preview, never on the analysed frame
+            if ui_scheduler.due("ui"):
+                ui_start = time.monotonic()
+                overlay = [
+                    (f"Mood: {mood}", (30, 40), 0.7, (90, 103, 216)),
+                    (f"Focus: {total_focus}", (30, 80), 0.7, (107, 70, 193)),
+                ]
+                if camera is None:
+                    overlay.append(("Cloud Mode", (30, 120), 0.6, (255, 255, 255)))
                 
-                with timer_placeholder.container():
-                    session_duration = current_time - st.session_state.session_start
-                    minutes = session_duration.seconds // 60
-                    st.markdown(f"""
-                    <div class='session-card'>
-                        <h3>⏱️ Session Timer</h3>
-                        <h2>{minutes} minutes</h2>
-                        <p>Stay focused! 💫</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            # Add overlay to frame
-            cv2.putText(frame, f"Mood: {mood}", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (90, 103, 216), 2)
-            cv2.putText(frame, f"Focus: {total_focus}", (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (107, 70, 193), 2)
-            
-            if not camera:
-                cv2.putText(frame, "Cloud Mode", (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            FRAME_WINDOW.image(frame, use_container_width=True)
-            
-            time.sleep(0.5)
+                with PERF.stage("ui.preview_encode"):
+                    encoded = preview.render(frame, overlay)
+                if encoded is not None:
+                    with PERF.stage("ui.preview_send"):
+                        FRAME_WINDOW.image(encoded, use_container_width=True)
+                ui_scheduler.record("ui", ui_start, time.monotonic())
         
-        # Cleanup
-        if camera:
-            camera.release()
+        # The hub releases the device once no session is subscribed
 
 # Mood Analysis Page
 elif page == "Mood Analysis":
     st.markdown('<h1 class="page-header">😊 Mood Analysis</h1>', unsafe_allow_html=True)
     
-    if not st.session_state.session_data:
+    samples, aggregates = get_analysis_data()
+    render_export_button(samples)
+    if aggregates.count == 0:
         st.info("🎯 Start a session to see your mood analysis here!")
     else:
-        mood_df = pd.DataFrame(st.session_state.session_data)
-        mood_counts = mood_df['mood'].value_counts()
+        import pandas as pd
+        mood_counts = pd.Series(aggregates.mood_counts, name="count").sort_values(ascending=False)
         
         col1, col2 = st.columns(2)
         
@@ -573,10 +576,14 @@ elif page == "Mood Analysis":
             <div class='metric-card'>
                 <h3>📊 Mood Summary</h3>
             """, unsafe_allow_html=True)
-            st.metric("Total Samples", len(mood_df))
+            st.metric("Total Samples", aggregates.count)
             if len(mood_counts) > 0:
                 st.metric("Most Common Mood", mood_counts.index[0])
             st.markdown("</div>", unsafe_allow_html=True)
+
+            st.markdown("**⏳ Time in Each Mood**")
+            for mood, seconds in sorted(aggregates.time_in_mood.items(), key=lambda item: -item[1]):
+                st.markdown(f"{get_mood_emoji(mood)} {mood}: {format_duration(seconds)}")
         
         with col2:
             st.markdown("""
@@ -590,33 +597,36 @@ elif page == "Mood Analysis":
 elif page == "Focus Tracking":
     st.markdown('<h1 class="page-header">🎯 Focus Tracking</h1>', unsafe_allow_html=True)
     
-    if not st.session_state.session_data:
+    samples, aggregates = get_analysis_data()
+    render_export_button(samples)
+    if aggregates.count == 0:
         st.info("🎯 Start a session to track your focus patterns!")
     else:
-        focus_df = pd.DataFrame(st.session_state.session_data)
-        if not focus_df.empty:
-            focus_df = focus_df.set_index('timestamp')
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                avg_focus = focus_df['focus'].mean()
-                max_focus = focus_df['focus'].max()
-                st.markdown("""
-                <div class='metric-card'>
-                    <h3>📊 Focus Metrics</h3>
-                """, unsafe_allow_html=True)
-                st.metric("Average Focus", f"{avg_focus:.2f}/1.0")
-                st.metric("Peak Focus", f"{max_focus:.2f}/1.0")
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("""
-                <div class='metric-card'>
-                    <h3>📈 Focus Trend</h3>
-                """, unsafe_allow_html=True)
+        focus_df = get_focus_trend(samples)
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("""
+            <div class='metric-card'>
+                <h3>📊 Focus Metrics</h3>
+            """, unsafe_allow_html=True)
+            st.metric("Average Focus", f"{aggregates.focus_mean:.2f}/1.0")
+            st.metric("Peak Focus", f"{aggregates.focus_max:.2f}/1.0")
+            st.metric("Focus Variability", f"±{aggregates.focus_std:.2f}")
+            st.metric("High-Focus Streak", format_duration(aggregates.current_streak),
+                      help=f"Longest: {format_duration(aggregates.longest_streak)}")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown("""
+            <div class='metric-card'>
+                <h3>📈 Focus Trend</h3>
+            """, unsafe_allow_html=True)
+            if focus_df.empty:
+                st.caption("The daemon keeps running totals only; pick a session source for the trend.")
+            else:
                 st.line_chart(focus_df['focus'])
-                st.markdown("</div>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
 
 # Recommendations Page
 elif page == "Recommendations":
@@ -629,30 +639,91 @@ elif page == "Recommendations":
     </div>
     ''', unsafe_allow_html=True)
     
-    st.markdown("""
+    rule_list = "".join(f"<p>• <strong>{rule['why']}</strong>: {rule['suggest']}</p>" for rule in RULES)
+    st.markdown(f"""
     <div class='metric-card'>
         <h3>🎯 How It Works</h3>
-        <p>• <strong>Low Focus (< 0.3)</strong>: Suggests breaks and relaxation</p>
-        <p>• <strong>Sad Mood</strong>: Recommends easier, creative tasks</p>
-        <p>• <strong>Happy + High Focus</strong>: Suggests deep work sessions</p>
-        <p>• <strong>Other cases</strong>: Balanced task recommendations</p>
+        <p>Every 2 minutes the first matching rule is applied to the last 5 minutes of your session:</p>
+        {rule_list}
     </div>
     """, unsafe_allow_html=True)
     
     # Example recommendations
     st.markdown("### 💫 Example Recommendations")
-    examples = [
-        {"emoji": "🎯", "text": "Take a 5-min break, stretch and relax"},
-        {"emoji": "💡", "text": "Do an easy/creative task to lift mood"}, 
-        {"emoji": "🚀", "text": "Great time for deep work (Pomodoro 25m)"},
-        {"emoji": "📚", "text": "Continue with medium tasks and stay consistent"}
-    ]
+    emojis = ["🎯", "⏸️", "🔄", "💡", "🚀", "📚"]
     
     cols = st.columns(2)
-    for idx, example in enumerate(examples):
+    for idx, rule in enumerate(RULES):
         with cols[idx % 2]:
             st.markdown(f"""
             <div class='metric-card'>
-                <h3>{example['emoji']} {example['text']}</h3>
+                <h3>{emojis[idx % len(emojis)]} {rule['suggest']}</h3>
             </div>
             """, unsafe_allow_html=True)
+
+# Performance Page
+elif page == "Performance":
+    import pandas as pd
+    st.markdown('<h1 class="page-header">⚡ Performance</h1>', unsafe_allow_html=True)
+    
+    PERF.enabled = st.checkbox("Record stage timings", value=PERF.enabled,
+                               help="Timing hooks cost almost nothing while this is off.")
+    if st.button("Reset statistics"):
+        PERF.reset()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div class='metric-card'>
+            <h3>📊 Counters</h3>
+        """, unsafe_allow_html=True)
+        st.metric("Ticks", PERF.counters.get("ticks", 0))
+        st.metric("Dropped Frames", PERF.counters.get("frames_dropped", 0))
+        if PERF.counters.get("ticks"):
+            st.metric("Buffer Allocations / Tick",
+                      f"{PERF.counters.get('frame_pool.allocations', 0) / PERF.counters['ticks']:.2f}",
+                      help="New frame buffers per analysis tick; stays near 0 once the pools are warm.")
+        suppressed = PERF.counters.get("ui.updates_suppressed", 0)
+        widget_updates = suppressed + PERF.counters.get("ui.updates_pushed", 0)
+        if widget_updates:
+            st.metric("Unchanged Widget Updates Skipped", f"{suppressed / widget_updates:.0%}",
+                      help=f"{suppressed} of {widget_updates} Dashboard card and caption updates weren't re-sent.")
+        st.metric("Subscribed Sessions", analysis_hub.subscriber_count)
+        detector_info = analysis_hub.detector_info()
+        if detector_info["cost"] is not None:
+            st.metric("Detector", f"{detector_info['cost'] * 1000:.1f} ms/frame",
+                      help=f"Backend: {detector_info['backend']}")
+            st.metric("Unchanged Frames Skipped", f"{detector_info['skip_ratio']:.0%}",
+                      help="Frames answered from the change gate instead of running detection.")
+        run_timings = get_run_timings()
+        if run_timings["cold_start"] is not None:
+            st.metric("Cold Start", f"{run_timings['cold_start'] * 1000:.0f} ms")
+        if run_timings["reruns"].count:
+            reruns = run_timings["reruns"].summary()
+            st.metric("Rerun (p50)", f"{reruns['p50_ms']:.0f} ms",
+                      help=f"p95 {reruns['p95_ms']:.0f} ms over {reruns['count']} reruns")
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class='metric-card'>
+            <h3>⏱️ Stage Rates</h3>
+        """, unsafe_allow_html=True)
+        rates = analysis_hub.rates()
+        if rates:
+            st.dataframe(pd.DataFrame(rates).T.round(2), use_container_width=True)
+        else:
+            st.info("Start a session to see stage rates.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("### 🔬 Stage Latency")
+    snapshot = PERF.snapshot()
+    if snapshot:
+        st.dataframe(pd.DataFrame(snapshot).T.round(3), use_container_width=True)
+    elif PERF.enabled:
+        st.info("Waiting for the Dashboard loop to record some timings...")
+    else:
+        st.info("Enable stage timings above, then run a session.")
+
+record_run_time()
@@ -0,0 +1,246 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.aggregates import SessionAggregates
+from src.backends import available_backends
+from src.focus import CLICK, KEY, MOVE, FocusLogger
+from src.mood import MoodDetector
+from src.preview import PreviewEncoder
+from src.recommender import TaskRecommender
+from src.rollups import RollupSeries
+from src.store import SampleStore
+
+RESOLUTIONS = {"240p": (240, 320), "480p": (480, 640), "720p": (720, 1280)}
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures")
+
+
+def synthetic_face(height, width):
+    """A drawn face the default frontal-face cascade detects; no camera or photos needed."""
+    img = np.full((height, width, 3), 90, np.uint8)
+    cx, cy, r = width // 2, height // 2, int(min(height, width) * 0.2)
+    cv2.ellipse(img, (cx, cy), (r, int(r * 1.3)), 0, 0, 360, (170, 190, 220), -1)
+    cv2.ellipse(img, (cx, cy - int(r * 0.9)), (int(r * 1.05), int(r * 0.6)), 0, 180, 360, (30, 30, 40), -1)
+    ey, ex = cy - int(r * 0.25), int(r * 0.42)
+    for side in (-1, 1):
+        cv2.ellipse(img, (cx + side * ex, ey), (int(r * 0.3), int(r * 0.16)), 0, 0, 360, (110, 120, 140), -1)
+        cv2.ellipse(img, (cx + side * ex, ey), (int(r * 0.16), int(r * 0.09)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(img, (cx + side * ex - int(r * 0.3), ey - int(r * 0.3)),
+                 (cx + side * ex + int(r * 0.3), ey - int(r * 0.3)), (30, 30, 30), max(2, int(r * 0.07)))
+    cv2.ellipse(img, (cx, cy + int(r * 0.2)), (int(r * 0.12), int(r * 0.08)), 0, 0, 360, (110, 120, 150), -1)
+    cv2.ellipse(img, (cx, cy + int(r * 0.6)), (int(r * 0.38), int(r * 0.1)), 0, 0, 360, (60, 60, 120), -1)
+    return cv2.GaussianBlur(img, (0, 0), 2)
+
+
+def make_frames():
+    """(name, frame) pairs: synthetic content at each resolution plus any fixture images."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for res, (h, w) in RESOLUTIONS.items():
+        frames.append((f"{res}/blank", np.zeros((h, w, 3), np.uint8)))
+        frames.append((f"{res}/noise", rng.integers(0, 256, (h, w, 3), dtype=np.uint8)))
+        frames.append((f"{res}/face", synthetic_face(h, w)))
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*"))):
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append((f"fixture/{os.path.splitext(os.path.basename(path))[0]}", image))
+    return frames
+
+
+def measure(fn, min_time=1.0, max_iterations=2000, warmup=3):
+    for _ in range(warmup):
+        fn()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_iterations and (len(times) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times = np.array(times)
+    return {
+        "iterations": len(times),
+        "mean_ms": float(times.mean() * 1000),
+        "p50_ms": float(np.percentile(times, 50) * 1000),
+        "p95_ms": float(np.percentile(times, 95) * 1000),
+        "ops_per_sec": float(1.0 / times.mean()),
+    }
+
+
+def bench_mood(results, min_time):
+    # "full" and "tracking" are the Haar backend; other backends run when their models are present
+    modes = [("full", "haar", False), ("tracking", "haar", True)]
+    modes += [(backend, backend, False) for backend in available_backends() if backend != "haar"]
+    for name, frame in make_frames():
+        for mode, backend, tracking in modes:
+            # The change gate would answer repeats of one frame from cache, so it's off here
+            detector = MoodDetector(tracking=tracking, backend=backend, change_threshold=None)
+            results[f"detect_mood/{mode}/{name}"] = measure(lambda: detector.detect_mood(frame), min_time)
+
+    # A still student: slightly noisy copies of one frame through the gated detector
+    rng = np.random.default_rng(3)
+    face = synthetic_face(480, 640)
+    noisy = [np.clip(face + rng.normal(0, 3, face.shape), 0, 255).astype(np.uint8) for _ in range(8)]
+    detector = MoodDetector(tracking=True)
+    counter = [0]
+    def gated():
+        counter[0] += 1
+        detector.detect_mood(noisy[counter[0] % len(noisy)])
+    results["detect_mood/gated/480p/still"] = measure(gated, min_time)
+    results["detect_mood/gated/480p/still"]["skip_ratio"] = detector.skip_ratio
+
+
+def event_stream(logger, seconds=60.0, rate=50.0):
+    """Heavy synthetic input: keys, clicks and coalesced moves at `rate` events/sec."""
+    rng = np.random.default_rng(1)
+    kinds = rng.choice([KEY, KEY, KEY, CLICK, MOVE], size=int(seconds * rate))
+    for i, kind in enumerate(kinds):
+        logger.record_event(int(kind), i / rate)
+    return seconds
+
+
+def bench_focus(results, min_time):
+    logger = FocusLogger(listen=False)
+    now = event_stream(logger)
+    results["focus/get_focus_score/50eps"] = measure(lambda: logger.get_focus_score(now), min_time)
+
+    counter = [0]
+    def record():
+        counter[0] += 1
+        logger.record_event(KEY, now + counter[0] * 1e-3)
+    results["focus/record_event"] = measure(record, min_time, max_iterations=100000)
+
+
+def bench_recommender(results, min_time):
+    recommender = TaskRecommender()
+    rng = np.random.default_rng(2)
+    moods = rng.choice(["Happy", "Serious", "Neutral", "Sad"], size=1000).tolist()
+    focus = rng.random(1000).tolist()
+    def suggest_batch():
+        for mood, f in zip(moods, focus):
+            recommender.suggest(mood, f)
+    result = measure(suggest_batch, min_time)
+    result["ops_per_sec"] *= len(moods)
+    results["recommender/suggest"] = result
+
+    # Streaming: one update plus a recommendation per 2 Hz sample
+    streaming = TaskRecommender()
+    clock = [0]
+    def update_and_recommend():
+        clock[0] += 500_000_000
+        i = clock[0] // 500_000_000 % len(moods)
+        streaming.update(clock[0], moods[i], focus[i])
+        streaming.recommend()
+    results["recommender/update"] = measure(update_and_recommend, min_time, max_iterations=100000)
+
+    # Batch replay of an 8-hour day sampled at 2 Hz
+    n = 8 * 3600 * 2
+    samples = SampleStore.from_arrays(np.arange(n, dtype=np.int64) * 500_000_000,
+                                      rng.integers(0, 4, n), rng.random(n))
+    result = measure(lambda: recommender.replay(samples), min_time)
+    result["ops_per_sec"] *= n
+    results["recommender/replay/8h"] = result
+
+
+def bench_tick(results, min_time):
+    """One simulated Dashboard tick: detect, score focus, record the sample and render the preview."""
+    frame = synthetic_face(480, 640)
+    detector = MoodDetector(tracking=True)
+    logger = FocusLogger(listen=False)
+    now = event_stream(logger)
+    samples, aggregates, rollups = SampleStore(), SessionAggregates(), RollupSeries()
+    preview = PreviewEncoder(fps=None, change_threshold=-1)
+    clock = [0]
+
+    def tick():
+        clock[0] += 500_000_000
+        mood, face_focus = detector.detect_mood(frame)
+        focus = round(face_focus * 0.6 + logger.get_focus_score(now) * 0.4, 2)
+        samples.append(clock[0], mood, focus)
+        aggregates.update(clock[0], mood, focus)
+        rollups.add(clock[0], focus)
+        preview.render(frame, [(f"Mood: {mood}", (30, 40), 0.7, (90, 103, 216))])
+    results["tick/480p/face"] = measure(tick, min_time)
+
+
+def run(min_time, only=None):
+    results = {}
+    suites = {
+        "detect_mood": bench_mood,
+        "focus": bench_focus,
+        "recommender": bench_recommender,
+        "tick": bench_tick,
+    }
+    for name, suite in suites.items():
+        if only and name not in only:
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        suite(results, min_time)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return the names of cases whose p50 got slower than baseline by more than threshold."""
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"  new        {name}")
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            status = "faster"
+        print(f"  {status:<10} {name}: {base['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the StudyMood pipeline without a camera.")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="where to write results")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed p50 slowdown (default: 0.15)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to run each case")
+    parser.add_argument("--only", nargs="*", help="suites to run: detect_mood focus recommender tick")
+    args = parser.parse_args(argv)
+
+    results = run(args.min_time, args.only)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for name, result in sorted(results["results"].items()):
+        print(f"{name:<45} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+              f"{result['ops_per_sec']:12.1f} ops/s")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import argparse
+import os
+
+from src.camera import CameraManager
+from src.focus import FocusLogger
+from src.hub import AnalysisHub
+from src.ipc import DEFAULT_ADDRESS, AnalysisServer, key_path
+from src.mood import MoodDetector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run capture and analysis headless for app.py and other tools.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help=f"host:port to listen on (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between samples")
+    parser.add_argument("--backend", help="detector backend: haar, haar-fast or dnn")
+    parser.add_argument("--record", help="record frames and input timing to this .smrec file for replay.py")
+    args = parser.parse_args(argv)
+
+    def components():
+        return CameraManager(), MoodDetector(tracking=True, backend=args.backend), FocusLogger()
+
+    # Linger forever: the daemon itself stays subscribed, so the camera stays open
+    hub = AnalysisHub(components, interval=args.interval)
+    server = AnalysisServer(hub, args.address)
+    if args.record:
+        print(f"Recording to {hub.start_recording(args.record)}")
+    if os.environ.get("STUDYMOOD_AUTHKEY"):
+        print(f"Serving analysis on {args.address} with the key from STUDYMOOD_AUTHKEY")
+    else:
+        print(f"Serving analysis on {args.address}; local clients read the key from {key_path(args.address)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        summary = hub.stop_recording()
+        if summary is not None:
+            print(f"Recorded {summary['frames']} frames, {summary['events']} input events and {summary['ticks']} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import time
+
+from src.export import FORMATS, available_formats, export_log, export_session
+from src.sessionlog import list_logs, open_log
+from src.store import SampleStore, merge_stores
+
+SESSION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export saved sessions to NPZ or Parquet files.")
+    parser.add_argument("logs", nargs="*", help="session logs or directories (default: the app's sessions/)")
+    parser.add_argument("-o", "--output", default="exports", help="output directory, or file with --combine")
+    parser.add_argument("--format", choices=FORMATS, default="npz", help="npz (NumPy only) or parquet (needs pyarrow)")
+    parser.add_argument("--combine", action="store_true", help="write every session into one file")
+    args = parser.parse_args(argv)
+
+    if args.format not in available_formats():
+        parser.error(f"{args.format} export needs pyarrow: pip install pyarrow")
+
+    paths = []
+    for target in args.logs or [SESSION_DIR]:
+        paths.extend(list_logs(target) if os.path.isdir(target) else [target])
+
+    start = time.perf_counter()
+    if args.combine:
+        stores = []
+        for path in paths:
+            try:
+                labels, records = open_log(path)
+            except (OSError, ValueError) as e:
+                print(f"Skipping session log {path}: {e}")
+                continue
+            stores.append(SampleStore.from_arrays(records["timestamp"], records["mood"], records["focus"], labels=labels))
+        samples = merge_stores(stores)
+        output = args.output if args.output.endswith(f".{args.format}") else f"{args.output}.{args.format}"
+        export_session(samples, output, args.format)
+        print(f"Exported {len(stores)} sessions, {len(samples)} samples to {output} "
+              f"in {time.perf_counter() - start:.2f}s")
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+    exported = total = 0
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0] + f".{args.format}"
+        output = os.path.join(args.output, name)
+        try:
+            count = export_log(path, output, args.format)
+        except (OSError, ValueError) as e:
+            print(f"Skipping session log {path}: {e}")
+            continue
+        exported += 1
+        total += count
+        print(f"{name}: {count} samples, {os.path.getsize(output) / 1024:.0f} KiB")
+    print(f"Exported {exported} sessions, {total} samples in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import sys
+
+import numpy as np
+
+from src.recording import replay_session
+
+
+def same_samples(a, b):
+    if len(a) != len(b):
+        return False
+    moods_a = np.array(a.labels, dtype=object)[a.moods]
+    moods_b = np.array(b.labels, dtype=object)[b.moods]
+    return (np.array_equal(a.timestamps, b.timestamps) and np.array_equal(a.focus, b.focus)
+            and np.array_equal(moods_a, moods_b))
+
+
+def print_stages(stages):
+    print(f"{'stage':<10} {'count':>7} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, histogram in stages.items():
+        s = histogram.summary()
+        print(f"{name:<10} {s['count']:>7} {s['mean_ms']:>9.3f} {s['p50_ms']:>8.3f} {s['p95_ms']:>8.3f} {s['max_ms']:>8.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the detector, focus logger and recommender.")
+    parser.add_argument("recording", help=".smrec file from the Dashboard's record option or daemon.py --record")
+    parser.add_argument("--realtime", action="store_true", help="keep the recorded pace instead of running flat out")
+    parser.add_argument("--backend", help="detector backend (default: the one used while recording)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times and check the runs agree")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if the replay differs from the recorded samples")
+    args = parser.parse_args(argv)
+
+    first = None
+    for run in range(args.repeat):
+        result = replay_session(args.recording, backend=args.backend, realtime=args.realtime)
+        samples = result["samples"]
+        speed = result["duration"] / max(result["seconds"], 1e-9)
+        print(f"Run {run + 1}: {len(samples)} samples, {result['duration']:.1f}s recorded, "
+              f"replayed in {result['seconds']:.2f}s ({speed:.1f}x) with {result['backend']}")
+        if first is None:
+            first = result
+        elif not same_samples(first["samples"], samples):
+            print("  differs from run 1")
+
+    print_stages(first["stages"])
+    for index, suggestion in first["suggestions"]:
+        print(f"  sample {index}: {suggestion}")
+
+    recorded = first["recorded"]
+    matches = same_samples(first["samples"], recorded)
+    if matches:
+        print("Replay matches the recorded samples")
+    elif len(recorded) == len(first["samples"]):
+        moods = np.array(first["samples"].labels, dtype=object)[first["samples"].moods]
+        recorded_moods = np.array(recorded.labels, dtype=object)[recorded.moods]
+        print(f"Replay differs from the recording: mood agrees on {np.mean(moods == recorded_moods):.0%} of samples, "
+              f"focus within 0.01 on {np.mean(np.abs(first['samples'].focus - recorded.focus) <= 0.01):.0%}")
+    else:
+        print(f"Replay gave {len(first['samples'])} samples, the recording has {len(recorded)}")
+    if args.check and not matches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import time
+
+from src.engine import MultiStreamEngine
+
+
+def print_status(engine, elapsed):
+    print(f"--- {elapsed:.0f}s ---")
+    for name, s in engine.stats().items():
+        if s["error"]:
+            print(f"{name:<9} {s['source']}: {s['error']}")
+            continue
+        focus = f"{s['focus']:.2f}" if s["focus"] is not None else "-"
+        print(f"{name:<9} {s['mood'] or '-':<8} focus {focus}  analysed {s['analysed']:>5}  "
+              f"skipped {s['skipped']:>4}  queue {s['queue_depth']}  {s['cost_ms']:.1f} ms/frame  "
+              f"{s['skip_ratio']:.0%} unchanged  ({s['source']})")
+    samples, aggregates = engine.combined()
+    if aggregates.count:
+        print(f"room      {aggregates.most_common_mood():<8} focus {aggregates.focus_mean:.2f} avg "
+              f"over {aggregates.count} samples")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse several cameras or video sources in one process.")
+    parser.add_argument("sources", nargs="+", help="device indices (0, 1...), video files or stream URLs")
+    parser.add_argument("--workers", type=int, default=None, help="detector threads (default: one per source, up to the core count)")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between samples per stream")
+    parser.add_argument("--queue", type=int, default=2, help="frames a stream may have waiting before old ones are dropped")
+    parser.add_argument("--backend", help="detector backend: haar, haar-fast or dnn")
+    parser.add_argument("--log-dir", help="write one session log per stream here")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (default: run until Ctrl+C)")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between status reports")
+    args = parser.parse_args(argv)
+
+    engine = MultiStreamEngine(args.sources, workers=args.workers, interval=args.interval,
+                               queue_size=args.queue, backend=args.backend, log_dir=args.log_dir)
+    engine.start()
+    print(f"Analysing {len(args.sources)} sources with {engine.workers} workers")
+    start = time.monotonic()
+    deadline = start + args.duration if args.duration else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            wait = args.report if deadline is None else min(args.report, deadline - time.monotonic())
+            time.sleep(max(0.0, wait))
+            print_status(engine, time.monotonic() - start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.recommender import TaskRecommender
+from src.sessionlog import list_logs, open_log
+from src.store import SampleStore
+
+SESSION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+
+
+def score_logs(paths, recommender):
+    """Per-log sample count and how many samples each rule would have fired on."""
+    scores = []
+    for path in paths:
+        try:
+            labels, records = open_log(path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping session log {path}: {e}")
+            continue
+        samples = SampleStore.from_arrays(records["timestamp"], records["mood"], records["focus"], labels=labels)
+        chosen = recommender.replay(samples)
+        scores.append((path, len(samples), np.bincount(chosen, minlength=len(recommender.rules))))
+    return scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay saved sessions through the recommendation rules.")
+    parser.add_argument("logs", nargs="*", help="session logs or directories (default: the app's sessions/)")
+    parser.add_argument("--window", type=float, default=300.0, help="recommendation window in seconds")
+    parser.add_argument("--per-session", action="store_true", help="print the rule mix of every session")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for target in args.logs or [SESSION_DIR]:
+        paths.extend(list_logs(target) if os.path.isdir(target) else [target])
+
+    recommender = TaskRecommender(window=args.window)
+    names = recommender.rule_names()
+    start = time.perf_counter()
+    scores = score_logs(paths, recommender)
+    elapsed = time.perf_counter() - start
+
+    total_samples = sum(n for _, n, _ in scores)
+    totals = sum((counts for _, _, counts in scores), np.zeros(len(names), dtype=np.int64))
+    if args.per_session:
+        for path, n, counts in scores:
+            mix = ", ".join(f"{name} {count / n:.0%}" for name, count in zip(names, counts) if count)
+            print(f"{os.path.basename(path)}: {n} samples, {mix}")
+    print(f"Replayed {len(scores)} sessions, {total_samples} samples in {elapsed:.2f}s")
+    for name, count in zip(names, totals):
+        share = count / total_samples if total_samples else 0.0
+        print(f"  {name:<15} {count:>9} samples  {share:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+HIGH_FOCUS = 0.7
+# Longer gaps between samples mean the session was paused or ended (history
+# concatenates sessions): credit at most this much time and end any streak
+MAX_GAP = 5.0
+
+
+class SessionAggregates:
+    """Running session statistics, updated in O(1) per sample."""
+
+    def __init__(self, high_focus=HIGH_FOCUS, max_gap=MAX_GAP):
+        self.high_focus = high_focus
+        self.max_gap = max_gap
+        self.count = 0
+        self.mood_counts = {}
+        self.time_in_mood = {}  # seconds, credited to the mood that was showing
+        self.focus_mean = 0.0
+        self.focus_max = None
+        self.current_streak = 0.0  # seconds at or above high_focus
+        self.longest_streak = 0.0
+        self._m2 = 0.0
+        self._last_ts = None
+        self._last_mood = None
+        self._streak_start = None
+
+    def update(self, timestamp_ns, mood, focus):
+        self.count += 1
+        self.mood_counts[mood] = self.mood_counts.get(mood, 0) + 1
+
+        gap = False
+        if self._last_ts is not None:
+            dt = (timestamp_ns - self._last_ts) / 1e9
+            gap = dt > self.max_gap
+            self.time_in_mood[self._last_mood] = self.time_in_mood.get(self._last_mood, 0.0) + min(dt, self.max_gap)
+        self._last_ts = timestamp_ns
+        self._last_mood = mood
+
+        # Welford's online mean/variance
+        delta = focus - self.focus_mean
+        self.focus_mean += delta / self.count
+        self._m2 += delta * (focus - self.focus_mean)
+        if self.focus_max is None or focus > self.focus_max:
+            self.focus_max = focus
+
+        if focus >= self.high_focus:
+            if self._streak_start is None or gap:
+                self._streak_start = timestamp_ns
+            self.current_streak = (timestamp_ns - self._streak_start) / 1e9
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+        else:
+            self._streak_start = None
+            self.current_streak = 0.0
+
+    @property
+    def focus_variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def focus_std(self):
+        return math.sqrt(self.focus_variance)
+
+    def most_common_mood(self):
+        if not self.mood_counts:
+            return None
+        return max(self.mood_counts, key=self.mood_counts.get)
+
+    @classmethod
+    def merge(cls, parts, high_focus=HIGH_FOCUS):
+        """Combine aggregates of parallel streams; times are summed, streaks are the best stream's."""
+        agg = cls(high_focus=high_focus)
+        for part in parts:
+            if part.count == 0:
+                continue
+            for mood, count in part.mood_counts.items():
+                agg.mood_counts[mood] = agg.mood_counts.get(mood, 0) + count
+            for mood, seconds in part.time_in_mood.items():
+                agg.time_in_mood[mood] = agg.time_in_mood.get(mood, 0.0) + seconds
+            # Chan et al. pairwise update of the running mean/variance
+            total = agg.count + part.count
+            delta = part.focus_mean - agg.focus_mean
+            agg._m2 += part._m2 + delta * delta * agg.count * part.count / total
+            agg.focus_mean += delta * part.count / total
+            agg.count = total
+            if agg.focus_max is None or part.focus_max > agg.focus_max:
+                agg.focus_max = part.focus_max
+            agg.current_streak = max(agg.current_streak, part.current_streak)
+            agg.longest_streak = max(agg.longest_streak, part.longest_streak)
+        return agg
+
+    @classmethod
+    def from_store(cls, store, high_focus=HIGH_FOCUS, max_gap=MAX_GAP):
+        """Build the same aggregates for a whole SampleStore in one vectorised pass."""
+        agg = cls(high_focus=high_focus, max_gap=max_gap)
+        n = len(store)
+        if n == 0:
+            return agg
+
+        timestamps = store.timestamps
+        moods = store.moods
+        focus = store.focus.astype(np.float64)
+        labels = store.labels
+
+        counts = np.bincount(moods, minlength=len(labels))
+        dt = np.diff(timestamps) / 1e9
+        seconds = np.bincount(moods[:-1], weights=np.minimum(dt, max_gap), minlength=len(labels))
+        agg.count = n
+        agg.mood_counts = {labels[i]: int(c) for i, c in enumerate(counts) if c > 0}
+        agg.time_in_mood = {labels[i]: float(seconds[i]) for i, c in enumerate(counts) if c > 0}
+        agg.focus_mean = float(focus.mean())
+        agg.focus_max = float(focus.max())
+        agg._m2 = float(((focus - agg.focus_mean) ** 2).sum())
+        agg._last_ts = int(timestamps[-1])
+        agg._last_mood = labels[moods[-1]]
+
+        # High-focus streaks are runs of consecutive samples above the threshold,
+        # broken by gaps longer than max_gap
+        high = focus >= high_focus
+        gap = np.concatenate(([True], dt > max_gap, [True]))
+        starts = np.flatnonzero(high & (gap[:-1] | ~np.concatenate(([False], high[:-1]))))
+        ends = np.flatnonzero(high & (gap[1:] | ~np.concatenate((high[1:], [False]))))
+        if len(starts) > 0:
+            durations = (timestamps[ends] - timestamps[starts]) / 1e9
+            agg.longest_streak = float(durations.max())
+            if ends[-1] == n - 1:
+                agg._streak_start = int(timestamps[starts[-1]])
+                agg.current_streak = float(durations[-1])
+        return agg
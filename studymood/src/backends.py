@@ -0,0 +1,247 @@
+import os
+
+import cv2
+import numpy as np
+
+from src.buffers import FramePool
+from src.perf import PERF
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+# name -> backend class; pick one with MoodDetector(backend=...) or STUDYMOOD_BACKEND
+BACKENDS = {}
+DEFAULT_BACKEND = "haar"
+
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def available_backends():
+    """Names of the registered backends whose models are present on this machine."""
+    return [name for name, cls in BACKENDS.items() if cls.available()]
+
+
+def create_backend(name, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown detector backend {name!r} (known: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
+
+
+class DetectorBackend:
+    """Turns a non-blank BGR frame into (mood, focus).
+
+    Backends set ``face_source`` ("detection", "tracking" or None) and
+    ``face_box`` for the frame they just analysed. Unknown options are ignored
+    so one set of settings can be passed to any backend.
+    """
+
+    name = None
+
+    def __init__(self, **options):
+        self.face_box = None
+        self.face_source = None
+        self.pool = FramePool()  # per-frame working images, reused across frames
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def reset(self):
+        self.face_box = None
+        self.face_source = None
+
+    def detect(self, frame):
+        raise NotImplementedError
+
+
+@register_backend("haar")
+class HaarBackend(DetectorBackend):
+    """Frontal-face and smile Haar cascades, the original StudyMood pipeline."""
+
+    def __init__(self, tracking=False, detect_every=10, detect_scale=0.5, roi_padding=0.3,
+                 scale_factor=1.3, min_neighbors=5, smile_scale_factor=1.8, smile_neighbors=20,
+                 smile_width=None, detect_width=None, **options):
+        super().__init__()
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self.smile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_smile.xml")
+        if self.face_cascade.empty() or self.smile_cascade.empty():
+            raise RuntimeError("Haar cascade files not found")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.smile_scale_factor = smile_scale_factor
+        self.smile_neighbors = smile_neighbors
+        self.smile_width = smile_width  # shrink the face before the smile search
+
+        # Tracking mode: full detection on a downscaled frame every N frames,
+        # otherwise only search a padded ROI around the last face
+        self.tracking = tracking
+        self.detect_every = detect_every
+        self.detect_scale = detect_scale
+        self.detect_width = detect_width  # when set, downscale to this width instead
+        self.roi_padding = roi_padding
+        self._frames_since_detect = 0
+
+    def reset(self):
+        super().reset()
+        self._frames_since_detect = 0
+
+    def detect(self, frame):
+        with PERF.stage("mood.cvtColor"):
+            gray = self.pool.gray("gray", frame)
+        with PERF.stage("mood.face_cascade"):
+            if self.tracking:
+                face = self._track_face(gray)
+            else:
+                faces = self.face_cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+                face = faces[0] if len(faces) > 0 else None
+                if face is not None:
+                    self.face_source = "detection"
+        if face is None:
+            return "Neutral", 0.5
+
+        x, y, w, h = face
+        roi_gray = gray[y:y+h, x:x+w]
+        if self.smile_width and w > self.smile_width:
+            roi_gray = self.pool.scale("smile", roi_gray, self.smile_width / w)
+        with PERF.stage("mood.smile_cascade"):
+            smiles = self.smile_cascade.detectMultiScale(roi_gray, self.smile_scale_factor, self.smile_neighbors)
+        mood = "Happy" if len(smiles) > 0 else "Serious"
+        return mood, 0.8  # Face detected → higher focus
+
+    def _track_face(self, gray):
+        if self.face_box is not None and self._frames_since_detect < self.detect_every:
+            box = self._search_roi(gray, self.face_box)
+            if box is not None:
+                self._frames_since_detect += 1
+                self.face_box = box
+                self.face_source = "tracking"
+                return box
+
+        # Tracking lost or refresh due: full detection on the downscaled frame
+        box = self._detect_downscaled(gray)
+        self._frames_since_detect = 0
+        self.face_box = box
+        if box is not None:
+            self.face_source = "detection"
+        return box
+
+    def _detect_downscaled(self, gray):
+        scale = self.detect_scale
+        if self.detect_width:
+            scale = min(1.0, self.detect_width / gray.shape[1])
+        small = self.pool.scale("detect", gray, scale)
+        faces = self.face_cascade.detectMultiScale(small, self.scale_factor, self.min_neighbors)
+        if len(faces) == 0:
+            return None
+        x, y, w, h = faces[0]
+        return (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+
+    def _search_roi(self, gray, box):
+        x, y, w, h = box
+        pad = int(max(w, h) * self.roi_padding)
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1, y1 = min(gray.shape[1], x + w + pad), min(gray.shape[0], y + h + pad)
+        roi = gray[y0:y1, x0:x1]
+
+        # The face can only have moved a little, so limit the scale range too
+        min_size = (int(w * 0.7), int(h * 0.7))
+        max_size = (int(w * 1.4), int(h * 1.4))
+        faces = self.face_cascade.detectMultiScale(roi, 1.1, self.min_neighbors, minSize=min_size, maxSize=max_size)
+        if len(faces) == 0:
+            return None
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return (int(fx + x0), int(fy + y0), int(fw), int(fh))
+
+
+@register_backend("haar-fast")
+class FastHaarBackend(HaarBackend):
+    """Haar tuned for thin clients: always tracks, coarser scale steps, smaller smile search."""
+
+    def __init__(self, **options):
+        options.update(tracking=True, detect_width=224, scale_factor=1.4, min_neighbors=4,
+                       smile_scale_factor=1.8, smile_neighbors=15, smile_width=96)
+        super().__init__(**options)
+
+
+@register_backend("dnn")
+class DnnBackend(DetectorBackend):
+    """YuNet face detector plus an optional FER+ expression model, both ONNX on the CPU.
+
+    Model paths default to ``studymood/models/`` and can be overridden with
+    STUDYMOOD_FACE_MODEL and STUDYMOOD_EXPRESSION_MODEL.
+    """
+
+    FACE_MODEL = "face_detection_yunet_2023mar.onnx"
+    EXPRESSION_MODEL = "emotion-ferplus-8.onnx"
+    # FER+ classes mapped onto the moods the rest of the app knows
+    EXPRESSIONS = ("Neutral", "Happy", "Serious", "Sad", "Serious", "Serious", "Serious", "Serious")
+
+    def __init__(self, face_model=None, expression_model=None, input_width=320, score_threshold=0.8, **options):
+        super().__init__()
+        face_model = face_model or self.face_model_path()
+        expression_model = expression_model or self.expression_model_path()
+        if not hasattr(cv2, "FaceDetectorYN"):
+            raise RuntimeError("this OpenCV build has no FaceDetectorYN")
+        if not os.path.exists(face_model):
+            raise RuntimeError(f"face model not found: {face_model}")
+
+        self.input_width = input_width
+        self.face_detector = cv2.FaceDetectorYN.create(face_model, "", (input_width, input_width), score_threshold)
+        self.face_detector.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.face_detector.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.expression_net = None
+        if os.path.exists(expression_model):
+            self.expression_net = cv2.dnn.readNetFromONNX(expression_model)
+            self.expression_net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.expression_net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self._input_size = None
+
+    @staticmethod
+    def face_model_path():
+        return os.environ.get("STUDYMOOD_FACE_MODEL", os.path.join(MODEL_DIR, DnnBackend.FACE_MODEL))
+
+    @staticmethod
+    def expression_model_path():
+        return os.environ.get("STUDYMOOD_EXPRESSION_MODEL", os.path.join(MODEL_DIR, DnnBackend.EXPRESSION_MODEL))
+
+    @classmethod
+    def available(cls):
+        return hasattr(cv2, "FaceDetectorYN") and os.path.exists(cls.face_model_path())
+
+    def detect(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.input_width / width)
+        small = frame
+        if scale < 1.0:
+            small = self.pool.scale("input", frame, scale)
+        size = (small.shape[1], small.shape[0])
+        if size != self._input_size:
+            self.face_detector.setInputSize(size)
+            self._input_size = size
+
+        with PERF.stage("mood.dnn_face"):
+            _, faces = self.face_detector.detect(small)
+        if faces is None or len(faces) == 0:
+            self.face_box = None
+            return "Neutral", 0.5
+
+        best = faces[np.argmax(faces[:, 14])]  # last column is the detection score
+        x, y, w, h = (best[:4] / scale).astype(int)
+        x, y = max(0, x), max(0, y)
+        w, h = min(w, width - x), min(h, height - y)
+        self.face_box = (int(x), int(y), int(w), int(h))
+        self.face_source = "detection"
+        if self.expression_net is None or w <= 0 or h <= 0:
+            return "Neutral", 0.8
+
+        with PERF.stage("mood.dnn_expression"):
+            face = self.pool.gray("face", frame[y:y+h, x:x+w])
+            # FER+ takes a raw 64x64 grayscale face, no mean/scale normalisation
+            self.expression_net.setInput(cv2.dnn.blobFromImage(face, 1.0, (64, 64)))
+            scores = self.expression_net.forward()
+        return self.EXPRESSIONS[int(np.argmax(scores))], 0.8
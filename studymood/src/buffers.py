@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from src.perf import PERF
+
+PLACEHOLDER_SHAPE = (480, 640, 3)
+
+
+class FramePool:
+    """Named image buffers reused from frame to frame; OpenCV writes into them with dst=.
+
+    A buffer is only reallocated when the shape it's asked for changes, so
+    ``allocations`` stays flat while the camera resolution does. A buffer is
+    overwritten by the next call for the same name: copy anything that has to
+    outlive the current frame. Not thread-safe; give each owner its own pool.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self.allocations = 0
+        self.reuses = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+            PERF.count("frame_pool.allocations")
+        else:
+            self.reuses += 1
+        return buffer
+
+    def gray(self, name, frame):
+        if frame.ndim == 2:
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.get(name, frame.shape[:2]))
+
+    def resize(self, name, image, size, interpolation=cv2.INTER_AREA):
+        """Resize to size=(width, height) into the named buffer."""
+        width, height = size
+        buffer = self.get(name, (height, width) + image.shape[2:], image.dtype)
+        return cv2.resize(image, size, dst=buffer, interpolation=interpolation)
+
+    def scale(self, name, image, scale, interpolation=cv2.INTER_AREA):
+        """Like cv2.resize(image, None, fx=scale, fy=scale) into the named buffer."""
+        size = (max(1, int(image.shape[1] * scale + 0.5)), max(1, int(image.shape[0] * scale + 0.5)))
+        return self.resize(name, image, size, interpolation)
+
+    def copy(self, name, image):
+        buffer = self.get(name, image.shape, image.dtype)
+        np.copyto(buffer, image)
+        return buffer
+
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+
+@lru_cache(maxsize=8)
+def placeholder_frame(*lines):
+    """Black frame with white text lines of (text, origin, size), drawn once and read-only."""
+    frame = np.zeros(PLACEHOLDER_SHAPE, dtype=np.uint8)
+    for text, origin, size in lines:
+        cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, size, (255, 255, 255), 2)
+    frame.setflags(write=False)
+    return frame
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import cv2
+
+from src.capture import FrameGrabber
+
+
+class CameraManager:
+    """Process-wide camera owner that survives Streamlit reruns."""
+
+    def __init__(self, indices=(0, 1, 2), idle_timeout=60.0, retry_interval=30.0):
+        self.indices = list(indices)
+        self.idle_timeout = idle_timeout
+        self.retry_interval = retry_interval
+        self.device_index = None
+        self.grabber = None
+        self.opens = 0
+        self.last_used = time.monotonic()
+        self._last_probe_failed = None
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def acquire(self):
+        """Return a running FrameGrabber, opening the camera only if needed."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self.grabber is not None:
+                if self.grabber.healthy():
+                    return self.grabber
+                # A real failure: drop the handle and reopen below
+                self._close()
+
+            # Don't re-probe every rerun when there is no camera at all
+            if (self._last_probe_failed is not None and
+                    time.monotonic() - self._last_probe_failed < self.retry_interval):
+                return None
+
+            camera = self._open()
+            if camera is None:
+                self._last_probe_failed = time.monotonic()
+                return None
+
+            self._last_probe_failed = None
+            self.opens += 1
+            self.grabber = FrameGrabber(camera).start()
+            self._start_reaper()
+            return self.grabber
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def release(self):
+        with self._lock:
+            self._close()
+
+    def _open(self):
+        # Try the device that worked last time before probing the others
+        candidates = self.indices
+        if self.device_index is not None:
+            candidates = [self.device_index] + [i for i in self.indices if i != self.device_index]
+
+        for camera_index in candidates:
+            try:
+                camera = cv2.VideoCapture(camera_index)
+                if camera.isOpened():
+                    ret, _ = camera.read()
+                    if ret:
+                        self.device_index = camera_index
+                        return camera
+                camera.release()
+            except Exception as e:
+                print(f"Camera {camera_index} failed to open: {e}")
+        return None
+
+    def _close(self):
+        if self.grabber is not None:
+            self.grabber.release()
+            self.grabber = None
+
+    def _start_reaper(self):
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap_idle, name="CameraReaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(1.0)
+            with self._lock:
+                if self.grabber is None:
+                    return
+                if time.monotonic() - self.last_used > self.idle_timeout:
+                    self._close()
+                    return
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import cv2
+
+from src.perf import PERF
+
+
+class FrameGrabber:
+    """Reads frames on a background thread and keeps only the newest one."""
+
+    def __init__(self, camera, fps=None, loop=False):
+        self.camera = camera
+        self.fps = fps  # pace reads for file sources; cameras pace themselves
+        self.loop = loop  # rewind file sources at the end instead of failing
+        self.frame = None
+        self.frame_id = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.consecutive_failures = 0
+        self.running = False
+        self.thread = None
+        self._consumed_id = 0
+        self._lock = threading.Lock()
+
+    def start(self, name="FrameGrabber"):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def release(self):
+        self.stop()
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+
+    def _run(self):
+        next_read = time.monotonic()
+        while self.running:
+            if self.fps:
+                delay = next_read - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_read = max(next_read + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+            with PERF.stage("camera.read"):
+                ret, frame = self.camera.read()
+            if not ret and self.loop and self.camera.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                ret, frame = self.camera.read()
+            if not ret:
+                self.read_failures += 1
+                self.consecutive_failures += 1
+                time.sleep(0.05)
+                continue
+            self.consecutive_failures = 0
+            with self._lock:
+                # The previous frame was never picked up by a consumer
+                if self.frame_id > self._consumed_id:
+                    self.frames_dropped += 1
+                    PERF.count("frames_dropped")
+                self.frame = frame
+                self.frame_id += 1
+                self.frames_read += 1
+
+    def latest(self):
+        """Return (frame_id, frame) for the newest frame without waiting."""
+        with self._lock:
+            self._consumed_id = self.frame_id
+            return self.frame_id, self.frame
+
+    def healthy(self, max_failures=20):
+        return self.running and self.consecutive_failures < max_failures
+
+
+def open_source(source):
+    """Open a device index ("0"), a video file or a stream URL; returns (capture, is_file)."""
+    if isinstance(source, int) or str(source).isdigit():
+        capture, is_file = cv2.VideoCapture(int(source)), False
+    else:
+        capture, is_file = cv2.VideoCapture(source), "://" not in source
+    if not capture.isOpened():
+        capture.release()
+        raise IOError(f"Could not open source: {source}")
+    return capture, is_file
+
+
+def iter_video_frames(path, stride=1):
+    """Yield (frame_index, seconds, frame) for every stride-th frame of a video file.
+
+    The generator's return value is the number of frames read from the file.
+    """
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    fps = video.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while True:
+            # grab() skips the colour conversion for frames we don't analyse
+            if not video.grab():
+                break
+            if index % stride == 0:
+                ret, frame = video.retrieve()
+                if not ret:
+                    break
+                yield index, index / fps, frame
+            index += 1
+    finally:
+        video.release()
+    return index
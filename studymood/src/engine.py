@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from src.aggregates import SessionAggregates
+from src.capture import FrameGrabber, open_source
+from src.mood import MoodDetector
+from src.scheduler import DeadlineScheduler
+from src.sessionlog import SessionLogWriter, new_log_path
+from src.store import SampleStore, merge_stores
+
+
+class Stream:
+    """One source in the engine: its grabber, pending frames and sample series."""
+
+    def __init__(self, name, source, detector, queue_size=2):
+        self.name = name
+        self.source = source
+        self.detector = detector  # per stream, so face tracking state stays with its camera
+        self.grabber = None
+        self.error = None
+        self.queue = deque()
+        self.queue_size = queue_size
+        self.busy = False  # a worker is analysing this stream right now
+        self.last_frame_id = 0
+        self.samples = SampleStore()
+        self.aggregates = SessionAggregates()
+        self.log = None
+        self.latest = None
+        self.frames_queued = 0
+        self.frames_skipped = 0  # dropped from the queue because workers fell behind
+        self.analysed = 0
+
+
+class MultiStreamEngine:
+    """Analyses several cameras or video sources with one bounded pool of workers.
+
+    Each source is read on its own FrameGrabber thread. Every ``interval`` the
+    newest frame of each stream goes into that stream's small queue; when the
+    queue is full the oldest frame is dropped, so a slow room never builds a
+    backlog. Worker threads take frames round-robin across streams, one frame
+    per stream at a time, and OpenCV releases the GIL while it detects.
+    """
+
+    def __init__(self, sources, workers=None, interval=0.5, queue_size=2, backend=None, log_dir=None):
+        self.interval = interval
+        self.workers = workers or min(len(sources), os.cpu_count() or 1)
+        self.log_dir = log_dir
+        self.streams = [
+            Stream(f"stream{i}", source, MoodDetector(tracking=True, backend=backend), queue_size)
+            for i, source in enumerate(sources)
+        ]
+        self.scheduler = None
+        self.running = False
+        self._next_stream = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        # The pool provides the parallelism; OpenCV's own threads would oversubscribe
+        cv2.setNumThreads(1)
+        for stream in self.streams:
+            try:
+                capture, is_file = open_source(stream.source)
+            except IOError as e:
+                stream.error = str(e)
+                print(e)
+                continue
+            fps = (capture.get(cv2.CAP_PROP_FPS) or 30.0) if is_file else None
+            stream.grabber = FrameGrabber(capture, fps=fps, loop=is_file).start(f"FrameGrabber-{stream.name}")
+            if self.log_dir is not None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                stream.log = SessionLogWriter(new_log_path(self.log_dir, prefix=stream.name))
+
+        self.running = True
+        self._threads = [threading.Thread(target=self._dispatch, name="EngineDispatch", daemon=True)]
+        self._threads += [threading.Thread(target=self._work, name=f"EngineWorker-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(2.0)
+        self._threads = []
+        for stream in self.streams:
+            if stream.grabber is not None:
+                stream.grabber.release()
+                stream.grabber = None
+            if stream.log is not None:
+                stream.log.close()
+                stream.log = None
+
+    def _dispatch(self):
+        scheduler = DeadlineScheduler()
+        scheduler.add_stage("dispatch", self.interval)
+        self.scheduler = scheduler
+        while self.running:
+            scheduler.run("dispatch", self._enqueue_frames)
+            scheduler.sleep_until_next()
+
+    def _enqueue_frames(self):
+        timestamp = time.time_ns()
+        with self._cond:
+            for stream in self.streams:
+                if stream.grabber is None:
+                    continue
+                frame_id, frame = stream.grabber.latest()
+                if frame is None or frame_id == stream.last_frame_id:
+                    continue
+                stream.last_frame_id = frame_id
+                if len(stream.queue) >= stream.queue_size:
+                    stream.queue.popleft()
+                    stream.frames_skipped += 1
+                stream.queue.append((timestamp, frame))
+                stream.frames_queued += 1
+            self._cond.notify_all()
+
+    def _take(self):
+        """Next (stream, timestamp, frame) round-robin across idle streams; call with the lock held."""
+        count = len(self.streams)
+        for offset in range(count):
+            stream = self.streams[(self._next_stream + offset) % count]
+            if stream.queue and not stream.busy:
+                self._next_stream = (self._next_stream + offset + 1) % count
+                stream.busy = True
+                timestamp, frame = stream.queue.popleft()
+                return stream, timestamp, frame
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = None
+                while self.running and job is None:
+                    job = self._take()
+                    if job is None:
+                        self._cond.wait()
+                if job is None:
+                    return
+            stream, timestamp, frame = job
+            try:
+                mood, focus = stream.detector.detect_mood(frame)
+            except Exception as e:
+                print(f"{stream.name} analysis failed: {e}")
+                mood, focus = "Neutral", 0.5
+            with self._cond:
+                stream.samples.append(timestamp, mood, focus)
+                stream.aggregates.update(timestamp, mood, focus)
+                stream.latest = (mood, focus)
+                stream.analysed += 1
+                stream.busy = False
+                self._cond.notify_all()
+            if stream.log is not None:
+                stream.log.append(timestamp, mood, focus)
+
+    def stats(self):
+        """Per-stream counters and latest result, keyed by stream name."""
+        with self._cond:
+            return {
+                stream.name: {
+                    "source": stream.source,
+                    "error": stream.error,
+                    "frames_read": stream.grabber.frames_read if stream.grabber is not None else 0,
+                    "queued": stream.frames_queued,
+                    "skipped": stream.frames_skipped,
+                    "analysed": stream.analysed,
+                    "queue_depth": len(stream.queue),
+                    "mood": stream.latest[0] if stream.latest else None,
+                    "focus": stream.latest[1] if stream.latest else None,
+                    "cost_ms": (stream.detector.cost or 0.0) * 1000,
+                    "skip_ratio": stream.detector.skip_ratio,
+                }
+                for stream in self.streams
+            }
+
+    def combined(self):
+        """Every stream's samples in time order plus the merged aggregates."""
+        with self._cond:
+            samples = merge_stores([stream.samples for stream in self.streams])
+            aggregates = SessionAggregates.merge([stream.aggregates for stream in self.streams])
+        return samples, aggregates
@@ -0,0 +1,133 @@
+import importlib.util
+import io
+import zipfile
+
+import numpy as np
+
+from src.sessionlog import open_log
+from src.store import SampleStore
+
+# Rows written per step, so exporting a long history never holds a second copy of it
+CHUNK_SIZE = 65536
+
+# NPZ needs only NumPy; Parquet is offered when pyarrow is installed
+FORMATS = ["npz", "parquet"]
+MIME_TYPES = {"npz": "application/zip", "parquet": "application/vnd.apache.parquet"}
+
+
+def parquet_available():
+    # find_spec instead of importing: pyarrow is slow to import and only needed on export
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != "parquet" or parquet_available()]
+
+
+def format_of(name):
+    """Export format from a file name's extension."""
+    fmt = name.rsplit(".", 1)[-1].lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format for {name!r}; use .npz or .parquet")
+    return fmt
+
+
+def export_session(samples, target, fmt="npz", chunk_size=CHUNK_SIZE):
+    """Write a SampleStore's columns to a path or binary file object.
+
+    NPZ members are timestamp (int64 epoch ns), mood (uint8 codes), focus
+    (float32) and labels, so ``np.load`` reads them back directly.
+    """
+    if fmt == "npz":
+        _write_npz(samples, target, chunk_size)
+    elif fmt == "parquet":
+        _write_parquet(samples, target, chunk_size)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+
+def export_log(path, target, fmt="npz", chunk_size=CHUNK_SIZE):
+    """Export a session log straight from its memory map; returns the sample count."""
+    labels, records = open_log(path)
+    samples = SampleStore.from_arrays(records["timestamp"], records["mood"], records["focus"], labels=labels)
+    export_session(samples, target, fmt, chunk_size)
+    return len(samples)
+
+
+def session_bytes(samples, fmt="npz"):
+    buffer = io.BytesIO()
+    export_session(samples, buffer, fmt)
+    return buffer.getvalue()
+
+
+def _write_npz(samples, target, chunk_size):
+    columns = [("timestamp", samples.timestamps), ("mood", samples.moods), ("focus", samples.focus)]
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, values in columns:
+            header = {
+                "descr": np.lib.format.dtype_to_descr(values.dtype),
+                "fortran_order": False,
+                "shape": (len(values),),
+            }
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array_header_1_0(member, header)
+                for start in range(0, len(values), chunk_size):
+                    member.write(np.ascontiguousarray(values[start:start + chunk_size]).tobytes())
+        with archive.open("labels.npy", "w") as member:
+            np.lib.format.write_array(member, np.array(samples.labels, dtype=str), allow_pickle=False)
+
+
+def _write_parquet(samples, target, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("timestamp", pa.timestamp("ns", tz="UTC")),
+        ("mood", pa.dictionary(pa.uint8(), pa.string())),
+        ("focus", pa.float32()),
+    ])
+    labels = pa.array(samples.labels, type=pa.string())
+    with pq.ParquetWriter(target, schema) as writer:
+        # One row group per chunk
+        for start in range(0, len(samples), chunk_size):
+            end = start + chunk_size
+            batch = pa.record_batch([
+                pa.array(samples.timestamps[start:end], type=schema.field("timestamp").type),
+                pa.DictionaryArray.from_arrays(pa.array(samples.moods[start:end], type=pa.uint8()), labels),
+                pa.array(samples.focus[start:end], type=pa.float32()),
+            ], schema=schema)
+            writer.write_table(pa.Table.from_batches([batch]))
+
+
+def read_session(source, fmt=None):
+    """Load an export (path or file object) into a SampleStore."""
+    if fmt is None:
+        fmt = format_of(source if isinstance(source, str) else getattr(source, "name", ""))
+    if fmt == "npz":
+        return _read_npz(source)
+    if fmt == "parquet":
+        return _read_parquet(source)
+    raise ValueError(f"Unknown export format {fmt!r}")
+
+
+def _read_npz(source):
+    with np.load(source, allow_pickle=False) as data:
+        if not {"timestamp", "mood", "focus", "labels"} <= set(data.files):
+            raise ValueError("Not a StudyMood export")
+        return SampleStore.from_arrays(data["timestamp"], data["mood"], data["focus"],
+                                       labels=[str(label) for label in data["labels"]])
+
+
+def _read_parquet(source):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(source, columns=["timestamp", "mood", "focus"]).unify_dictionaries()
+    moods = table.column("mood")
+    if not pa.types.is_dictionary(moods.type):
+        moods = moods.dictionary_encode()
+    moods = moods.combine_chunks()
+    timestamps = table.column("timestamp").cast(pa.int64()).to_numpy()
+    focus = table.column("focus").to_numpy()
+    return SampleStore.from_arrays(timestamps, moods.indices.to_numpy(zero_copy_only=False), focus,
+                                   labels=moods.dictionary.to_pylist())
@@ -1,44 +1,125 @@
+import math
+import time
+from array import array
+
 try:
     from pynput import keyboard, mouse
-    import threading
     PYNPUT_AVAILABLE = True
 except ImportError:
     PYNPUT_AVAILABLE = False
-    import threading
+
+# Event kinds stored in the ring, and how much each counts towards activity
+KEY, CLICK, SCROLL, MOVE = 0, 1, 2, 3
+EVENT_KINDS = ("key", "click", "scroll", "move")
+EVENT_WEIGHTS = (1.0, 1.0, 0.5, 0.5)
+
+
+class EventRing:
+    """Preallocated ring of (monotonic time, kind) written by a single thread.
+
+    The writer fills the slot before bumping ``count``, so readers never need
+    a lock; they just ignore anything older than the ring can hold. With a
+    ``tau`` the writer also keeps the exponentially decayed weight of every
+    event pushed, as one (time, weight) tuple so readers see a consistent pair.
+    """
+
+    def __init__(self, capacity=4096, tau=None):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.kinds = array("b", bytes(capacity))
+        self.count = 0
+        self.tau = tau
+        self.decayed = (0.0, 0.0)
+
+    def push(self, t, kind):
+        i = self.count % self.capacity
+        self.times[i] = t
+        self.kinds[i] = kind
+        if self.tau is not None:
+            last, weight = self.decayed
+            if t >= last:
+                self.decayed = (t, weight * math.exp(-(t - last) / self.tau) + EVENT_WEIGHTS[kind])
+            else:
+                self.decayed = (last, weight + EVENT_WEIGHTS[kind] * math.exp(-(last - t) / self.tau))
+        self.count += 1
+
+    def decayed_weight(self, now):
+        """Sum of event weights decayed by exp(-age / tau) at time now, in O(1)."""
+        last, weight = self.decayed
+        return weight * math.exp(-(now - last) / self.tau)
+
+    def after(self, seen, until=None):
+        """(count, events) for events pushed after the first `seen`, oldest first.
+
+        Stops at the first event later than `until`; pass the returned count as
+        `seen` next time to pick up from there.
+        """
+        count = self.count
+        events = []
+        for n in range(max(seen, count - self.capacity), count):
+            i = n % self.capacity
+            t = self.times[i]
+            if until is not None and t > until:
+                return n, events
+            events.append((t, self.kinds[i]))
+        return count, events
+
 
 class FocusLogger:
-    def __init__(self):
-        self.activity_count = 0
-        self.lock = threading.Lock()
-        if PYNPUT_AVAILABLE:
+    def __init__(self, half_life=15.0, full_rate=3.0, move_interval=0.25, listen=True):
+        # Focus is an exponentially weighted event rate, kept up to date as
+        # events arrive; reading it never drains state, so the poll rate doesn't matter
+        self.tau = half_life / math.log(2)
+        self.full_rate = full_rate  # weighted events/sec that count as full focus
+        self.move_interval = move_interval
+        self.keyboard_events = EventRing(tau=self.tau)
+        self.mouse_events = EventRing(tau=self.tau)
+        self._last_move = 0.0
+        self.simulated = listen and not PYNPUT_AVAILABLE
+        if listen and PYNPUT_AVAILABLE:
             self.start_listeners()
-        else:
+        elif listen:
             print("pynput not available - using simulated focus tracking")
 
     def start_listeners(self):
         if not PYNPUT_AVAILABLE:
             return
-            
-        def on_press(key): 
-            with self.lock: 
-                self.activity_count += 1
+
+        # Each listener thread is the only writer of its own ring
+        def on_press(key):
+            self.keyboard_events.push(time.monotonic(), KEY)
         def on_click(x, y, button, pressed):
             if pressed:
-                with self.lock: 
-                    self.activity_count += 1
+                self.mouse_events.push(time.monotonic(), CLICK)
+        def on_scroll(x, y, dx, dy):
+            self.mouse_events.push(time.monotonic(), SCROLL)
+        def on_move(x, y):
+            # Coalesce the flood of move events into one per move_interval
+            now = time.monotonic()
+            if now - self._last_move >= self.move_interval:
+                self._last_move = now
+                self.mouse_events.push(now, MOVE)
 
         self.k_listener = keyboard.Listener(on_press=on_press)
-        self.m_listener = mouse.Listener(on_click=on_click)
+        self.m_listener = mouse.Listener(on_click=on_click, on_scroll=on_scroll, on_move=on_move)
         self.k_listener.start()
         self.m_listener.start()
 
-    def get_focus_score(self):
-        with self.lock:
-            if PYNPUT_AVAILABLE:
-                score = min(self.activity_count / 20, 1.0)
-                self.activity_count = 0
-            else:
-                # Simulate activity for cloud deployment
-                import random
-                score = random.uniform(0.4, 0.8)
-            return score
+    def record_event(self, kind, t=None):
+        """Feed an event by hand (replay, benchmarks) when not listening."""
+        t = time.monotonic() if t is None else t
+        ring = self.keyboard_events if kind == KEY else self.mouse_events
+        ring.push(t, kind)
+
+    def activity_rate(self, now=None):
+        now = time.monotonic() if now is None else now
+        weight = self.keyboard_events.decayed_weight(now) + self.mouse_events.decayed_weight(now)
+        # Normalise so a steady rate r gives back r
+        return weight / self.tau
+
+    def get_focus_score(self, now=None):
+        if self.simulated:
+            # Simulate activity for cloud deployment
+            import random
+            return random.uniform(0.4, 0.8)
+        return min(self.activity_rate(now) / self.full_rate, 1.0)
@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import namedtuple
+
+from src.perf import PERF
+from src.scheduler import DeadlineScheduler
+
+HubSample = namedtuple("HubSample", "seq timestamp_ns mood face_focus activity_focus focus")
+
+
+class Subscription:
+    """A session's read cursor on the hub; reading never consumes anything."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.last_seq = 0
+        self.last_seen = time.monotonic()
+        self.dropped = False  # set by the hub when this tab stopped reading for too long
+
+    def next(self, timeout=None):
+        """Wait for a sample newer than the last one seen; None on timeout."""
+        self.last_seen = time.monotonic()
+        if self.dropped:
+            # The tab is back after the hub gave up on it: register again,
+            # restarting the hub (and camera) if it stopped meanwhile
+            self.hub.resubscribe(self)
+        sample = self.hub.wait_sample(self.last_seq, timeout)
+        if sample is not None:
+            self.last_seq = sample.seq
+        return sample
+
+    def latest_frame(self):
+        return self.hub.latest_frame()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class AnalysisHub:
+    """Captures and analyses once per tick and fans the result out to every subscriber."""
+
+    def __init__(self, component_factory, interval=0.5, capture_interval=1 / 15,
+                 detection_budget=0.5, linger=5.0, stale_after=30.0):
+        # component_factory() -> (camera_manager, mood_detector, focus_logger); it
+        # runs on first use so opening the app doesn't load cascades or listeners
+        self.component_factory = component_factory
+        self.camera_manager = None
+        self.mood_detector = None
+        self.focus_logger = None
+        self.components_loaded = False
+        self.interval = interval
+        self.capture_interval = capture_interval
+        self.detection_budget = detection_budget
+        self.linger = linger  # keep running briefly so a rerun can resubscribe
+        self.stale_after = stale_after  # drop subscribers whose tab went away
+        self.grabber = None
+        self.frame = None
+        self.mood, self.face_focus = "Neutral", 0.5
+        self.sample = None
+        self._seq = 0  # keeps counting across restarts so cursors never go backwards
+        self.scheduler = None
+        self.recorder = None
+        self._subscribers = set()
+        self._last_unsubscribe = None
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def load_components(self):
+        with self._cond:
+            if not self.components_loaded:
+                self.camera_manager, self.mood_detector, self.focus_logger = self.component_factory()
+                self.components_loaded = True
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        self.resubscribe(subscription)
+        return subscription
+
+    def resubscribe(self, subscription):
+        self.load_components()
+        with self._cond:
+            subscription.dropped = False
+            subscription.last_seen = time.monotonic()
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="AnalysisHub", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                self._last_unsubscribe = time.monotonic()
+
+    def wait_sample(self, last_seq, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.sample is not None and self.sample.seq > last_seq, timeout)
+            if self.sample is not None and self.sample.seq > last_seq:
+                return self.sample
+            return None
+
+    def latest_frame(self):
+        return self.frame
+
+    def rates(self):
+        scheduler = self.scheduler
+        return scheduler.rates() if scheduler is not None else {}
+
+    def acquire_camera(self):
+        """Open the camera if needed; returns its device index, or None without one."""
+        self.load_components()
+        if self.camera_manager is None:
+            return None
+        if self.camera_manager.acquire() is None:
+            return None
+        return self.camera_manager.device_index
+
+    def set_detector_backend(self, name):
+        """Switch the shared detector's backend; returns the backend now in use."""
+        self.load_components()
+        detector = self.mood_detector
+        if not hasattr(detector, "set_backend"):
+            return None
+        if detector.requested_backend != name:
+            detector.set_backend(name)
+        return detector.backend_name
+
+    def detector_info(self):
+        """Backend name, EWMA per-frame cost in seconds and change-gate skip ratio; values may be None."""
+        detector = self.mood_detector
+        return {
+            "backend": getattr(detector, "backend_name", None),
+            "cost": getattr(detector, "cost", None),
+            "skip_ratio": getattr(detector, "skip_ratio", None),
+        }
+
+    def start_recording(self, path, quality=90):
+        """Record analysed frames, input events and samples to path (see src.recording).
+
+        Returns the path used, which gets a suffix if path already exists.
+        """
+        from src.recording import SessionRecorder
+
+        self.load_components()
+        metadata = {
+            "interval": self.interval,
+            "backend": getattr(self.mood_detector, "backend_name", None),
+            # Without real input events there's nothing to replay the activity score from
+            "simulated_focus": getattr(self.focus_logger, "simulated", True),
+        }
+        recorder = SessionRecorder(path, quality=quality, metadata=metadata)
+        with self._cond:
+            previous, self.recorder = self.recorder, recorder
+            # Replay starts with fresh tracking, so start the live detector the same way
+            if hasattr(self.mood_detector, "reset_tracking"):
+                self.mood_detector.reset_tracking()
+        if previous is not None:
+            previous.close()
+        return recorder.path
+
+    def stop_recording(self, path=None):
+        """Finish the recording (only if it is the one at path); returns its counts or None."""
+        with self._cond:
+            recorder = self.recorder
+            if recorder is None or (path is not None and recorder.path != path):
+                return None
+            self.recorder = None
+        return recorder.close()
+
+    def _should_stop(self):
+        with self._cond:
+            now = time.monotonic()
+            stale = {s for s in self._subscribers if now - s.last_seen > self.stale_after}
+            if stale:
+                for subscription in stale:
+                    subscription.dropped = True
+                self._subscribers -= stale
+                if not self._subscribers:
+                    self._last_unsubscribe = now
+            if self._subscribers or now - self._last_unsubscribe <= self.linger:
+                return False
+            # Last subscriber is gone: give the camera back before a new
+            # subscriber can start another thread
+            self._thread = None
+            self.grabber = None
+            self.frame = None
+            # A subscriber that comes later must not get a sample from before the stop
+            self.sample = None
+            self.mood, self.face_focus = "Neutral", 0.5
+            if self.camera_manager is not None:
+                self.camera_manager.release()
+            return True
+
+    def _run(self):
+        # Detection backs off when it overruns its CPU budget and recovers with
+        # headroom; samples are still published at the focus sampling rate
+        scheduler = DeadlineScheduler()
+        scheduler.add_stage("capture", self.capture_interval)
+        scheduler.add_stage("detection", self.interval, adaptive=True, budget=self.detection_budget)
+        scheduler.add_stage("focus", self.interval)
+        self.scheduler = scheduler
+
+        while not self._should_stop():
+            now = time.monotonic()
+            try:
+                if scheduler.due("capture", now):
+                    scheduler.run("capture", self._capture)
+                if scheduler.due("detection", now):
+                    scheduler.run("detection", self._detect)
+                if scheduler.due("focus", now):
+                    scheduler.run("focus", self._publish)
+            except Exception as e:
+                print(f"Analysis hub tick failed: {e}")
+            scheduler.sleep_until_next()
+
+    def _capture(self):
+        if self.camera_manager is None:
+            return
+        if self.grabber is None or not self.grabber.healthy():
+            self.grabber = self.camera_manager.acquire()
+        self.camera_manager.touch()
+        if self.grabber is not None and self.grabber.healthy():
+            self.frame = self.grabber.latest()[1]
+        else:
+            self.frame = None
+
+    def _detect(self):
+        with PERF.stage("hub.detect_mood"):
+            self.mood, self.face_focus = self.mood_detector.detect_mood(self.frame)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.frame(time.monotonic(), self.frame)
+
+    def _publish(self):
+        now = time.monotonic()
+        with PERF.stage("hub.focus_score"):
+            activity_focus = self.focus_logger.get_focus_score()
+        total_focus = round((self.face_focus * 0.6 + activity_focus * 0.4), 2)
+        self._seq += 1
+        sample = HubSample(self._seq, time.time_ns(), self.mood, self.face_focus, activity_focus, total_focus)
+        with self._cond:
+            self.sample = sample
+            self._cond.notify_all()
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.tick(now, self.focus_logger, sample)
+        PERF.count("ticks")
@@ -0,0 +1,455 @@
+import os
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError, resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.aggregates import SessionAggregates
+
+DEFAULT_ADDRESS = "localhost:6099"
+MAX_FRAME_SHAPE = (1080, 1920, 3)
+
+# Shared-memory header, followed by two frame slots of MAX_FRAME_SHAPE bytes each
+HEADER_DTYPE = np.dtype([
+    ("seq", "<u8"),  # seqlock: odd while the writer is updating
+    ("slot", "<u4"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("channels", "<u4"),
+    ("frame_id", "<u8"),
+    ("owner_pid", "<u4"),
+])
+HEADER_SIZE = 64
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port)
+
+
+def key_path(address):
+    """Where a daemon on this machine leaves its key for local clients."""
+    _, port = parse_address(address)
+    return os.path.join(os.path.expanduser("~"), ".studymood", f"daemon-{port}.key")
+
+
+def frame_buffer_name(address):
+    """Shared-memory segment name for the daemon at address, so daemons on other ports don't collide."""
+    host, port = parse_address(address)
+    host = "".join(c if c.isalnum() else "_" for c in host)
+    return f"studymood_frame_{host}_{port}"
+
+
+def _process_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def authkey(address):
+    """Shared key: STUDYMOOD_AUTHKEY, else the local daemon's key file; None when there is neither.
+
+    Messages are pickled, so the key is what stops other local users running
+    code in the daemon; there is deliberately no default.
+    """
+    key = os.environ.get("STUDYMOOD_AUTHKEY")
+    if key:
+        return key.encode()
+    try:
+        with open(key_path(address), "rb") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_key(address, key):
+    """Leave key where local clients look for it, readable by this user only."""
+    path = key_path(address)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    temp = f"{path}.{os.getpid()}"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(temp, path)
+    return path
+
+
+class SharedFrameBuffer:
+    """Latest camera frame in shared memory, one writer and any number of readers.
+
+    The writer alternates between two slots and bumps ``seq`` to odd before and
+    to even after each write. A reader copies the current slot and then checks
+    that the writer hasn't come back round to it meanwhile.
+    """
+
+    def __init__(self, name, create=False, max_shape=MAX_FRAME_SHAPE):
+        self.slot_size = int(np.prod(max_shape))
+        size = HEADER_SIZE + 2 * self.slot_size
+        if create:
+            try:
+                existing = SharedMemory(name)
+            except FileNotFoundError:
+                pass
+            else:
+                # A daemon that crashed can leave its segment behind; a live one keeps it
+                owner = int(np.ndarray((), HEADER_DTYPE, buffer=existing.buf)["owner_pid"])
+                existing.close()
+                if owner != os.getpid() and _process_alive(owner):
+                    resource_tracker.unregister(existing._name, "shared_memory")
+                    raise RuntimeError(f"shared frame buffer {name} is in use by process {owner}")
+                existing.unlink()
+            self.shm = SharedMemory(name, create=True, size=size)
+        else:
+            self.shm = SharedMemory(name)
+            # Readers must not unlink the writer's segment when they exit
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.owner = create
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.shm.buf)
+        self.pixels = np.ndarray((2, self.slot_size), np.uint8, buffer=self.shm.buf, offset=HEADER_SIZE)
+        if create:
+            self.header["seq"] = 0
+            self.header["owner_pid"] = os.getpid()
+        self.owner_pid = int(self.header["owner_pid"])
+
+    def write(self, frame, frame_id):
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        if height * width * channels > self.slot_size:
+            raise ValueError(f"frame {frame.shape} is larger than the shared buffer")
+        header = self.header
+        seq = int(header["seq"])
+        slot = 1 - int(header["slot"]) if seq else 0
+        header["seq"] = seq + 1
+        np.copyto(self.pixels[slot, :height * width * channels].reshape(frame.shape), frame)
+        header["slot"] = slot
+        header["height"], header["width"], header["channels"] = height, width, channels
+        header["frame_id"] = frame_id
+        header["seq"] = seq + 2
+
+    def clear(self):
+        header = self.header
+        seq = int(header["seq"])
+        header["seq"] = seq + 1
+        header["height"] = 0
+        header["seq"] = seq + 2
+
+    def read(self, copy=True, retries=5, pool=None):
+        """(frame_id, frame) for the newest frame, or None when there isn't one.
+
+        The frame is a copy (into ``pool`` when given) checked against the
+        seqlock after copying. With copy=False the check only covers the
+        header: the view stays intact for about one capture period, so the
+        caller must be done with it (or have copied it) by then.
+        """
+        header = self.header
+        for _ in range(retries):
+            seq = int(header["seq"])
+            if seq % 2:
+                time.sleep(0.001)
+                continue
+            height = int(header["height"])
+            if height == 0:
+                return None
+            width, channels = int(header["width"]), int(header["channels"])
+            frame_id = int(header["frame_id"])
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            frame = self.pixels[int(header["slot"]), :height * width * channels].reshape(shape)
+            if pool is not None:
+                frame = pool.copy("shared_frame", frame)
+            elif copy:
+                frame = frame.copy()
+            # Fine if the writer only finished or started the other slot meanwhile
+            if int(header["seq"]) - seq <= 2:
+                return frame_id, frame
+        return None
+
+    def close(self):
+        self.header = None
+        self.pixels = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class AnalysisServer:
+    """Serves an AnalysisHub to other processes: frames via shared memory, the rest via IPC."""
+
+    def __init__(self, hub, address=DEFAULT_ADDRESS, frame_interval=1 / 15):
+        self.hub = hub
+        self.address = address
+        self.frame_interval = frame_interval
+        self.frames = SharedFrameBuffer(frame_buffer_name(address), create=True)
+        self.aggregates = SessionAggregates()
+        self.subscribers = 0
+        self.running = False
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        self.running = True
+        # Without STUDYMOOD_AUTHKEY each run gets a random key, published only
+        # once the port is ours so a second daemon can't replace the first one's key
+        key_file = None
+        key = os.environ.get("STUDYMOOD_AUTHKEY", "").encode() or secrets.token_hex(32).encode()
+        self._listener = Listener(parse_address(self.address), authkey=key)
+        if not os.environ.get("STUDYMOOD_AUTHKEY"):
+            key_file = write_key(self.address, key)
+        # Keep the hub running with no browser attached; this is what keeps the camera open
+        subscription = self.hub.subscribe()
+        threading.Thread(target=self._accept, name="AnalysisServer", daemon=True).start()
+        publisher = threading.Thread(target=self._publish_frames, name="FramePublisher", daemon=True)
+        publisher.start()
+        try:
+            while self.running:
+                sample = subscription.next(timeout=1.0)
+                if sample is not None:
+                    self.aggregates.update(sample.timestamp_ns, sample.mood, sample.focus)
+        finally:
+            self.running = False
+            subscription.close()
+            self._listener.close()
+            publisher.join()
+            # Tabs still mapping the segment see "no frame" rather than the last one
+            self.frames.clear()
+            self.frames.close()
+            if key_file is not None:
+                try:
+                    os.remove(key_file)
+                except OSError:
+                    pass
+
+    def stop(self):
+        self.running = False
+
+    def _publish_frames(self):
+        last = None
+        frame_id = 0
+        while self.running:
+            frame = self.hub.latest_frame()
+            if frame is not last:
+                if frame is None:
+                    self.frames.clear()
+                else:
+                    frame_id += 1
+                    try:
+                        self.frames.write(frame, frame_id)
+                    except ValueError as e:
+                        print(e)
+                last = frame
+            time.sleep(self.frame_interval)
+
+    def _accept(self):
+        while self.running:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                break
+            except Exception as e:
+                print(f"Rejected connection: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(connection,), name="AnalysisClient", daemon=True).start()
+
+    def _serve(self, connection):
+        subscribed = False
+        try:
+            while self.running:
+                request = connection.recv()
+                if request[0] == "wait_sample" and not subscribed:
+                    subscribed = True
+                    with self._lock:
+                        self.subscribers += 1
+                connection.send(self._handle(*request))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            if subscribed:
+                with self._lock:
+                    self.subscribers -= 1
+
+    def _handle(self, op, *args):
+        hub = self.hub
+        if op == "wait_sample":
+            return hub.wait_sample(*args)
+        if op == "rates":
+            return hub.rates()
+        if op == "subscribers":
+            return self.subscribers
+        if op == "acquire_camera":
+            return hub.acquire_camera()
+        if op == "set_detector_backend":
+            return hub.set_detector_backend(*args)
+        if op == "detector_info":
+            return hub.detector_info()
+        if op == "aggregates":
+            return self.aggregates
+        if op == "start_recording":
+            return hub.start_recording(*args)
+        if op == "stop_recording":
+            return hub.stop_recording(*args)
+        raise ValueError(f"unknown request {op!r}")
+
+
+class RemoteSubscription:
+    """Same interface as hub.Subscription, over its own connection to the daemon."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.last_seq = 0
+        self.last_timestamp_ns = 0
+        self.connection = hub.connect()
+        from src.buffers import FramePool  # OpenCV; only needed once a session starts
+        self.pool = FramePool()  # this tab's copy of the shared frame
+
+    def next(self, timeout=None):
+        if not self.hub.connected:
+            return None
+        try:
+            self.connection.send(("wait_sample", self.last_seq, timeout))
+            sample = self.connection.recv()
+        except (EOFError, OSError) as e:
+            print(f"Lost connection to the analysis daemon: {e}")
+            time.sleep(timeout or 0.5)
+            connection = self.hub.reconnect()
+            if connection is not None:
+                # A restarted daemon counts from 1 again; skip anything already seen
+                self.connection = connection
+                self.last_seq = 0
+            return None
+        if sample is not None:
+            self.last_seq = sample.seq
+            if sample.timestamp_ns <= self.last_timestamp_ns:
+                return None
+            self.last_timestamp_ns = sample.timestamp_ns
+        return sample
+
+    def latest_frame(self):
+        return self.hub.latest_frame(pool=self.pool)
+
+    def close(self):
+        self.connection.close()
+
+
+class RemoteHub:
+    """Client for an AnalysisServer with the AnalysisHub interface the app uses."""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        self.frames = None
+        self.connected = True  # False once the daemon has gone and didn't come back
+        self._connection = self.connect()
+        self._lock = threading.Lock()
+        self._frames_lock = threading.Lock()
+        self._frames_stale = False
+
+    @classmethod
+    def connect_to(cls, address=DEFAULT_ADDRESS):
+        """A RemoteHub, or None when no daemon is listening."""
+        try:
+            return cls(address)
+        except (ConnectionError, OSError, AuthenticationError) as e:
+            if isinstance(e, AuthenticationError):
+                print(f"Analysis daemon at {address} rejected our key: {e}")
+            return None
+
+    def connect(self, quiet=False):
+        key = authkey(self.address)
+        try:
+            if key is None:
+                raise ConnectionRefusedError(f"no key for the daemon at {self.address}; is it running?")
+            return Client(parse_address(self.address), authkey=key)
+        except (ConnectionError, OSError, AuthenticationError):
+            if not quiet:
+                raise
+            return None
+
+    def reconnect(self):
+        """A new connection after losing the daemon, or None (and disconnected) if it's gone."""
+        connection = self.connect(quiet=True) if self.connected else None
+        if connection is None:
+            self.connected = False
+        # A restarted daemon publishes frames in a new segment
+        self._frames_stale = True
+        return connection
+
+    def alive(self):
+        """Whether the daemon still answers; a dead client should be replaced, not reused."""
+        try:
+            self._request("subscribers")
+        except ConnectionError:
+            return False
+        return True
+
+    def _request(self, *request):
+        with self._lock:
+            if self.connected:
+                try:
+                    self._connection.send(request)
+                    return self._connection.recv()
+                except (EOFError, OSError):
+                    pass
+                # Daemon restarted: reconnect once and retry
+                connection = self.reconnect()
+                if connection is not None:
+                    self._connection = connection
+                    try:
+                        connection.send(request)
+                        return connection.recv()
+                    except (EOFError, OSError):
+                        self.connected = False
+            raise ConnectionError(f"lost the analysis daemon at {self.address}")
+
+    @property
+    def subscriber_count(self):
+        return self._request("subscribers")
+
+    def subscribe(self):
+        return RemoteSubscription(self)
+
+    def latest_frame(self, pool=None):
+        """Newest frame; copied into pool if given, otherwise a view valid for about one capture period."""
+        with self._frames_lock:
+            # The segment we mapped is unlinked once its daemon exits; map the new one
+            if self.frames is not None and (self._frames_stale or not _process_alive(self.frames.owner_pid)):
+                self.frames.close()
+                self.frames = None
+            self._frames_stale = False
+            if self.frames is None:
+                try:
+                    self.frames = SharedFrameBuffer(frame_buffer_name(self.address))
+                except FileNotFoundError:
+                    return None
+            latest = self.frames.read(copy=False, pool=pool)
+        return latest[1] if latest is not None else None
+
+    def rates(self):
+        return self._request("rates")
+
+    def acquire_camera(self):
+        return self._request("acquire_camera")
+
+    def set_detector_backend(self, name):
+        return self._request("set_detector_backend", name)
+
+    def detector_info(self):
+        return self._request("detector_info")
+
+    def aggregates(self):
+        return self._request("aggregates")
+
+    def start_recording(self, path, quality=90):
+        # The daemon writes the file, so the path is on the daemon's machine
+        return self._request("start_recording", path, quality)
+
+    def stop_recording(self, path=None):
+        return self._request("stop_recording", path)
@@ -1,37 +1,181 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import cv2
 import numpy as np
 
+from src.backends import DEFAULT_BACKEND, create_backend
+from src.buffers import FramePool
+from src.perf import PERF
+
 class MoodDetector:
-    def __init__(self):
+    def __init__(self, tracking=False, backend=None, change_threshold=1.5, max_reuse=10, **options):
+        # Backend comes from the argument, then STUDYMOOD_BACKEND, then the Haar default;
+        # options (detect_every, detect_scale, roi_padding, model paths...) go to the backend
+        self.tracking = tracking
+        self.options = options
+        self.cost = None  # EWMA of per-frame backend time, seconds
+
+        # Change gate: while a tiny grayscale thumbnail stays within change_threshold
+        # (mean absolute difference, 0-255) of the last analysed frame, reuse that
+        # result; after max_reuse reuses in a row the frame is analysed anyway.
+        # change_threshold=None analyses every frame.
+        self.change_threshold = change_threshold
+        self.max_reuse = max_reuse
+        self.frames_checked = 0
+        self.frames_reused = 0
+        self._last_thumb = None
+        self._last_result = None
+        self._reused_in_row = 0
+        self.pool = FramePool()  # thumbnail buffers, reused every frame
+        # set_backend may come from another thread (the Streamlit one) than detect_mood
+        self._lock = threading.Lock()
+        self.set_backend(backend or os.environ.get("STUDYMOOD_BACKEND", DEFAULT_BACKEND))
+
+    def set_backend(self, name):
+        # Build the new backend outside the lock so detection isn't held up by model loading
         try:
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-            self.smile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_smile.xml")
-            self.cascade_loaded = True
-        except Exception as e:
-            self.cascade_loaded = False
-            print(f"Cascade classifiers not available: {e}")
+            backend = create_backend(name, tracking=self.tracking, **self.options)
+        except (ValueError, RuntimeError, cv2.error) as e:
+            print(f"Detector backend {name!r} not available: {e}")
+            backend = None
+            if name != DEFAULT_BACKEND:
+                try:
+                    backend = create_backend(DEFAULT_BACKEND, tracking=self.tracking, **self.options)
+                except (RuntimeError, cv2.error) as e:
+                    print(f"Cascade classifiers not available: {e}")
+        with self._lock:
+            self.requested_backend = name
+            self.backend = backend
+            self.backend_name = backend.name if backend is not None else None
+            self.cascade_loaded = backend is not None
+            self.cost = None
+            self._last_thumb = None
+
+    @property
+    def face_source(self):
+        return self.backend.face_source if self.backend is not None else None
+
+    @property
+    def face_box(self):
+        return self.backend.face_box if self.backend is not None else None
+
+    @property
+    def skip_ratio(self):
+        """Share of non-blank frames answered from the change gate instead of the backend."""
+        return self.frames_reused / self.frames_checked if self.frames_checked else 0.0
+
+    def reset_tracking(self):
+        with self._lock:
+            if self.backend is not None:
+                self.backend.reset()
+            self._last_thumb = None
+
+    def _thumbnail(self, frame):
+        # Subsample to ~128 px wide before the area resize, so this stays well under a millisecond
+        step = max(1, frame.shape[1] // 128)
+        small = self.pool.gray("thumb_gray", self.pool.copy("thumb_sample", frame[::step, ::step]))
+        return self.pool.resize("thumb", small, (32, 24))
 
     def detect_mood(self, frame):
+        with self._lock:
+            return self._detect(frame)
+
+    def _detect(self, frame):
         mood = "Neutral"
         focus = 0.5  # Default focus when no camera
-        
-        if self.cascade_loaded and frame is not None and frame.size > 0 and np.mean(frame) > 0:
-            try:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-                
-                for (x, y, w, h) in faces:
-                    roi_gray = gray[y:y+h, x:x+w]
-                    smiles = self.smile_cascade.detectMultiScale(roi_gray, 1.8, 20)
-                    if len(smiles) > 0:
-                        mood = "Happy"
-                    else:
-                        mood = "Serious"
-                    focus = 0.8  # Face detected → higher focus
-                    break
-                    
-            except Exception as e:
-                # If face detection fails, use default values
-                print(f"Face detection error: {e}")
-        
+        backend = self.backend
+        if backend is None or frame is None or frame.size == 0:
+            return mood, focus
+
+        with PERF.stage("mood.change_gate"):
+            thumb = self._thumbnail(frame)
+            if not thumb.any():
+                # Blank frame (camera covered or not delivering yet)
+                backend.face_source = None
+                self._last_thumb = None
+                return mood, focus
+            self.frames_checked += 1
+            if (self.change_threshold is not None and self._last_thumb is not None and
+                    self._reused_in_row < self.max_reuse and
+                    cv2.norm(thumb, self._last_thumb, cv2.NORM_L1) < self.change_threshold * thumb.size):
+                self._reused_in_row += 1
+                self.frames_reused += 1
+                PERF.count("detections_skipped")
+                return self._last_result
+
+        backend.face_source = None
+        start = time.perf_counter()
+        try:
+            mood, focus = backend.detect(frame)
+        except Exception as e:
+            # If face detection fails, use default values
+            print(f"Face detection error: {e}")
+        cost = time.perf_counter() - start
+        previous = self.cost
+        self.cost = cost if previous is None else 0.8 * previous + 0.2 * cost
+        PERF.record(f"mood.backend.{backend.name}", cost)
+
+        # Later frames are compared with the last analysed one, so slow drift still triggers;
+        # the thumbnail buffer is reused, so keep a copy
+        if self._last_thumb is None:
+            self._last_thumb = thumb.copy()
+        else:
+            np.copyto(self._last_thumb, thumb)
+        self._last_result = (mood, focus)
+        self._reused_in_row = 0
         return mood, focus
+
+    def detect_moods(self, frames, workers=None, chunksize=8):
+        return detect_moods(frames, workers=workers, chunksize=chunksize, backend=self.backend_name)
+
+
+# Batch API: each pool worker loads the cascades once and keeps them. The change
+# gate stays off, since which frame a worker saw last depends on how frames
+# were split up, and batch results must match detect_mood on each frame.
+_worker_detector = None
+
+def _init_worker(backend=None):
+    global _worker_detector
+    # One OpenCV thread per process, the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _worker_detector = MoodDetector(backend=backend, change_threshold=None)
+
+def _detect_chunk(frames):
+    return [_worker_detector.detect_mood(frame) for frame in frames]
+
+def _chunked(frames, chunksize):
+    chunk = []
+    for frame in frames:
+        chunk.append(frame)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_detect_moods(frames, workers=None, chunksize=8, backend=None):
+    """Yield (mood, focus) for each frame in input order using a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        detector = MoodDetector(backend=backend, change_threshold=None)
+        for frame in frames:
+            yield detector.detect_mood(frame)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,)) as pool:
+        pending = deque()
+        for chunk in _chunked(frames, chunksize):
+            pending.append(pool.submit(_detect_chunk, chunk))
+            # Bound the chunks in flight so long iterators don't fill memory
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def detect_moods(frames, workers=None, chunksize=8, backend=None):
+    """Return a list of (mood, focus) results for a sequence or iterator of frames."""
+    return list(iter_detect_moods(frames, workers=workers, chunksize=chunksize, backend=backend))
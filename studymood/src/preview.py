@@ -0,0 +1,83 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from src.buffers import FramePool
+
+FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+class PreviewEncoder:
+    """Downscales and encodes preview frames at their own rate, skipping unchanged ones."""
+
+    def __init__(self, width=480, quality=70, fmt="jpeg", fps=5.0, change_threshold=1.5):
+        self.width = width
+        self.quality = quality
+        self.fmt = fmt
+        # With fps=None the caller decides when to render
+        self.interval = 1.0 / fps if fps else 0.0
+        self.change_threshold = change_threshold
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.bytes_sent = 0
+        self._next_due = 0.0
+        self._last_thumb = None
+        self._last_lines = None
+        self.pool = FramePool()  # the downscaled copy we draw on and its thumbnail
+        self._recent = deque()  # (time, bytes) over the last few seconds
+
+    def render(self, frame, lines=(), now=None):
+        """Return encoded bytes for the preview, or None if nothing needs sending."""
+        now = time.monotonic() if now is None else now
+        if now < self._next_due:
+            return None
+        self._next_due = now + self.interval
+
+        # The overlay is drawn on a pooled copy, so the caller's frame can be shared or read-only
+        scale = min(1.0, self.width / frame.shape[1])
+        if scale < 1.0:
+            small = self.pool.scale("preview", frame, scale)
+        else:
+            small = self.pool.copy("preview", frame)
+
+        # Skip the send when neither the picture nor the overlay visibly changed
+        thumb = self.pool.resize("thumb", self.pool.gray("gray", small), (32, 24))
+        lines = tuple(lines)
+        if (self._last_thumb is not None and lines == self._last_lines and
+                cv2.norm(thumb, self._last_thumb, cv2.NORM_L1) < self.change_threshold * thumb.size):
+            self.frames_skipped += 1
+            return None
+        if self._last_thumb is None:
+            self._last_thumb = thumb.copy()
+        else:
+            np.copyto(self._last_thumb, thumb)
+        self._last_lines = lines
+
+        for text, origin, size, color in lines:
+            x, y = origin
+            cv2.putText(small, text, (int(x * scale), int(y * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                        size * max(scale, 0.5), color, 1 if scale < 0.75 else 2)
+
+        ext, flag = FORMATS[self.fmt]
+        ok, encoded = cv2.imencode(ext, small, [flag, int(self.quality)])
+        if not ok:
+            return None
+        data = encoded.tobytes()
+
+        self.frames_sent += 1
+        self.bytes_sent += len(data)
+        self._recent.append((now, len(data)))
+        while self._recent[0][0] < now - 5.0:
+            self._recent.popleft()
+        return data
+
+    def bytes_per_second(self, now=None):
+        now = time.monotonic() if now is None else now
+        while self._recent and self._recent[0][0] < now - 5.0:
+            self._recent.popleft()
+        return sum(size for _, size in self._recent) / 5.0
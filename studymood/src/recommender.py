@@ -1,9 +1,227 @@
+import operator
+from collections import deque
+
+import numpy as np
+
+# Rules are checked in order and the first whose conditions all hold wins.
+# Conditions compare a feature (see TaskRecommender.features) with a constant;
+# share_<mood> is that mood's share of the window's samples.
+RULES = [
+    {"name": "low_focus", "when": [("focus_mean", "<", 0.3)],
+     "suggest": "Take a 5-min break, stretch and relax.",
+     "why": "Low focus (< 0.3) over the last few minutes"},
+    {"name": "overdue_break", "when": [("minutes_since_break", ">=", 50)],
+     "suggest": "You've studied for almost an hour, take a 10-min break.",
+     "why": "No break for 50 minutes"},
+    {"name": "fading", "when": [("focus_slope", "<", -0.05), ("focus_drop", ">", 0.15)],
+     "suggest": "Focus is fading, switch to a lighter task or review your notes.",
+     "why": "Focus falling and well below your half-hour average"},
+    {"name": "sad", "when": [("share_sad", ">=", 0.4)],
+     "suggest": "Do an easy/creative task to lift mood.",
+     "why": "Mostly sad mood"},
+    {"name": "deep_work", "when": [("share_happy", ">=", 0.4), ("focus_mean", ">", 0.6)],
+     "suggest": "Great time for deep work (Pomodoro 25m).",
+     "why": "Mostly happy with high focus"},
+    {"name": "steady", "when": [],
+     "suggest": "Continue with medium tasks and stay consistent.",
+     "why": "Everything else"},
+]
+
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def compile_rules(rules):
+    """Resolve operators once: [(name, suggestion, ((feature, op, value), ...)), ...]."""
+    compiled = []
+    for rule in rules:
+        conditions = tuple((feature, OPERATORS[op], value) for feature, op, value in rule["when"])
+        compiled.append((rule["name"], rule["suggest"], conditions))
+    if compiled and compiled[-1][2]:
+        raise ValueError("the last rule must have no conditions so every state gets a suggestion")
+    return compiled
+
+
+class _Window:
+    """Samples from the last `seconds` with running sums for mean and least-squares slope."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()
+        self.n = 0
+        self.sum_t = self.sum_f = self.sum_tt = self.sum_tf = 0.0
+        self.mood_counts = {}
+
+    def push(self, t, mood, focus):
+        self.samples.append((t, mood, focus))
+        self._add(t, mood, focus, 1)
+        while self.samples[0][0] <= t - self.seconds:
+            self._add(*self.samples.popleft(), -1)
+
+    def _add(self, t, mood, focus, sign):
+        self.n += sign
+        self.sum_t += sign * t
+        self.sum_f += sign * focus
+        self.sum_tt += sign * t * t
+        self.sum_tf += sign * t * focus
+        self.mood_counts[mood] = self.mood_counts.get(mood, 0) + sign
+
+    def mean(self):
+        return self.sum_f / self.n
+
+    def slope(self):
+        denominator = self.n * self.sum_tt - self.sum_t * self.sum_t
+        # Relative cut-off: with one sample (or all at one time) this is rounding noise
+        if denominator <= 1e-9 * self.n * self.sum_tt:
+            return 0.0
+        return (self.n * self.sum_tf - self.sum_t * self.sum_f) / denominator
+
+
 class TaskRecommender:
+    """Suggests what to do next from a sliding window over the sample stream.
+
+    ``update`` is O(1) amortised per sample and ``recommend`` evaluates the
+    compiled rule table; ``replay`` computes the same thing for a whole
+    recorded timeline with NumPy. ``suggest(mood, focus)`` still works on a
+    single sample.
+    """
+
+    def __init__(self, rules=RULES, window=300.0, long_window=1800.0, break_focus=0.3, break_seconds=120.0):
+        self.rules = compile_rules(rules)
+        self.window = window
+        self.long_window = long_window
+        self.break_focus = break_focus
+        self.break_seconds = break_seconds  # this long below break_focus (or with no samples) is a break
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._base = None
+        self._last_t = None
+        self._low_since = None
+        self._last_break = None
+        self._recent = _Window(self.window)
+        self._long = _Window(self.long_window)
+
+    def update(self, timestamp_ns, mood, focus):
+        if self._base is None:
+            self._base = timestamp_ns
+        # Seconds since the first sample keeps the running sums small
+        t = (timestamp_ns - self._base) / 1e9
+        mood = mood.lower()
+        if self._last_t is None or t - self._last_t > self.break_seconds:
+            self._last_break = t
+        if focus < self.break_focus:
+            if self._low_since is None:
+                self._low_since = t
+            if t - self._low_since >= self.break_seconds:
+                self._last_break = t
+        else:
+            self._low_since = None
+        self._last_t = t
+        self._recent.push(t, mood, focus)
+        self._long.push(t, mood, focus)
+        self.count += 1
+
+    def features(self):
+        recent = self._recent
+        features = {
+            "focus_mean": recent.mean(),
+            "focus_slope": recent.slope() * 60.0,  # per minute
+            "focus_drop": self._long.mean() - recent.mean(),
+            "minutes_since_break": (self._last_t - self._last_break) / 60.0,
+        }
+        for mood, count in recent.mood_counts.items():
+            features[f"share_{mood}"] = count / recent.n
+        return features
+
+    def recommend(self):
+        """Suggestion for the current window; None before the first sample."""
+        if self.count == 0:
+            return None
+        return self._evaluate(self.features())
+
     def suggest(self, mood, focus):
-        if focus < 0.3:
-            return "Take a 5-min break, stretch and relax."
-        if mood == "Sad" or mood == "sad":
-            return "Do an easy/creative task to lift mood."
-        if mood == "Happy" and focus > 0.6:
-            return "Great time for deep work (Pomodoro 25m)."
-        return "Continue with medium tasks and stay consistent."
+        """Suggestion for a single sample, without touching the stream state."""
+        return self._evaluate({
+            "focus_mean": focus,
+            "focus_slope": 0.0,
+            "focus_drop": 0.0,
+            "minutes_since_break": 0.0,
+            f"share_{mood.lower()}": 1.0,
+        })
+
+    def _evaluate(self, features):
+        for _, suggestion, conditions in self.rules:
+            for feature, op, value in conditions:
+                if not op(features.get(feature, 0.0), value):
+                    break
+            else:
+                return suggestion
+
+    def replay(self, samples):
+        """Index into ``rules`` chosen after each sample of a SampleStore, as update() would."""
+        n = len(samples)
+        if n == 0:
+            return np.empty(0, dtype=np.intp)
+        t = (samples.timestamps - samples.timestamps[0]) / 1e9
+        focus = samples.focus.astype(np.float64)
+        labels = [label.lower() for label in samples.labels]
+        moods = samples.moods
+
+        def windowed(seconds):
+            # Window of sample i is (t[i] - seconds, t[i]], matching _Window.push
+            start = np.searchsorted(t, t - seconds, side="right")
+            def total(values):
+                cumulative = np.concatenate(([0.0], np.cumsum(values)))
+                return cumulative[1:] - cumulative[start]
+            return start, total
+
+        start, total = windowed(self.window)
+        count = np.arange(1, n + 1) - start
+        sum_t, sum_f = total(t), total(focus)
+        sum_tt, sum_tf = total(t * t), total(t * focus)
+        mean = sum_f / count
+        denominator = count * sum_tt - sum_t * sum_t
+        valid = denominator > 1e-9 * count * sum_tt
+        slope = np.zeros(n)
+        slope[valid] = (count * sum_tf - sum_t * sum_f)[valid] / denominator[valid]
+
+        long_start, long_total = windowed(self.long_window)
+        long_mean = long_total(focus) / (np.arange(1, n + 1) - long_start)
+
+        # Breaks: gaps between samples, or the end of a long enough low-focus run
+        index = np.arange(n)
+        low = focus < self.break_focus
+        run_start = np.maximum.accumulate(np.where(low & ~np.concatenate(([False], low[:-1])), index, 0))
+        on_break = low & (t - t[run_start] >= self.break_seconds)
+        gap = np.concatenate(([True], np.diff(t) > self.break_seconds))
+        last_break = np.maximum.accumulate(np.where(on_break | gap, t, -np.inf))
+
+        features = {
+            "focus_mean": mean,
+            "focus_slope": slope * 60.0,
+            "focus_drop": long_mean - mean,
+            "minutes_since_break": (t - last_break) / 60.0,
+        }
+        mood_counts = {}
+        for code, label in enumerate(labels):
+            mood_counts[label] = mood_counts.get(label, 0) + total(moods == code)
+        for label, counts in mood_counts.items():
+            features[f"share_{label}"] = counts / count
+
+        chosen = np.full(n, len(self.rules) - 1, dtype=np.intp)
+        undecided = np.ones(n, dtype=bool)
+        zeros = np.zeros(n)
+        for i, (_, _, conditions) in enumerate(self.rules):
+            match = undecided.copy()
+            for feature, op, value in conditions:
+                match &= op(features.get(feature, zeros), value)
+            chosen[match] = i
+            undecided &= ~match
+        return chosen
+
+    def rule_names(self):
+        return [name for name, _, _ in self.rules]
+
+    def suggestions(self):
+        return [suggestion for _, suggestion, _ in self.rules]
@@ -0,0 +1,207 @@
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from src.perf import LatencyHistogram
+from src.sessionlog import open_new
+from src.store import SampleStore
+
+# File layout: header, JSON metadata, then records of (kind, seconds since the
+# recording started, payload length) followed by the payload
+MAGIC = b"SMREC\x00\x00\x01"
+VERSION = 1
+RECORDING_SUFFIX = ".smrec"
+_HEADER = struct.Struct("<8sIqI")
+_RECORD = struct.Struct("<BdI")
+_TICK = struct.Struct("<qddd")  # wall-clock ns, face focus, activity focus, focus; then the mood
+
+# Record kinds: a frame the detector analysed (JPEG, empty when there was no
+# frame), one keyboard/mouse event (its focus.EVENT_KINDS code) and a published sample
+FRAME, EVENT, TICK = 0, 1, 2
+
+# How often replay asks for a suggestion, in recording time, like the Dashboard
+SUGGESTION_INTERVAL = 120
+
+
+def new_recording_path(directory):
+    return os.path.join(directory, time.strftime("recording-%Y%m%d-%H%M%S") + RECORDING_SUFFIX)
+
+
+class SessionRecorder:
+    """Records what an AnalysisHub analyses so a session can be replayed without a camera.
+
+    Frames are stored as JPEG at ``quality``; input events are copied from the
+    FocusLogger's rings at each tick, up to the tick's time.
+    """
+
+    def __init__(self, path, quality=90, metadata=None):
+        import cv2
+
+        self.quality = quality
+        self.origin = time.monotonic()
+        self.frames = self.events = self.ticks = 0
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._seen = None
+        # The hub thread writes while another thread may close
+        self._lock = threading.Lock()
+        info = json.dumps(dict(metadata or {}, quality=quality)).encode("utf-8")
+        self._file, self.path = open_new(path, buffering=256 * 1024)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, time.time_ns(), len(info)) + info)
+        self._file.flush()
+
+    def _write(self, kind, t, payload=b""):
+        self._file.write(_RECORD.pack(kind, t - self.origin, len(payload)))
+        self._file.write(payload)
+
+    def frame(self, t, frame):
+        import cv2
+
+        payload = b""
+        if frame is not None and frame.size:
+            ok, encoded = cv2.imencode(".jpg", frame, self._encode_params)
+            if ok:
+                payload = encoded.tobytes()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(FRAME, t, payload)
+            self.frames += 1
+
+    def tick(self, t, focus_logger, sample):
+        rings = [getattr(focus_logger, name, None) for name in ("keyboard_events", "mouse_events")]
+        rings = [ring for ring in rings if ring is not None]
+        if self._seen is None:
+            # Start with every event the rings still hold, so the first replayed
+            # scores decay the same history
+            self._seen = [max(0, ring.count - ring.capacity) for ring in rings]
+        events = []
+        for i, ring in enumerate(rings):
+            self._seen[i], new = ring.after(self._seen[i], until=t)
+            events.extend(new)
+        payload = _TICK.pack(sample.timestamp_ns, sample.face_focus, sample.activity_focus, sample.focus)
+        with self._lock:
+            if self._file.closed:
+                return
+            for event_t, kind in sorted(events):
+                self._write(EVENT, event_t, bytes((kind,)))
+            self.events += len(events)
+            self._write(TICK, t, payload + sample.mood.encode("utf-8"))
+            self.ticks += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        return {"path": self.path, "frames": self.frames, "events": self.events, "ticks": self.ticks}
+
+
+def read_recording(path):
+    """(metadata, records) where records yields (kind, seconds, payload) lazily."""
+    f = open(path, "rb")
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        f.close()
+        raise ValueError("Not a StudyMood recording")
+    magic, version, created_ns, info_len = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        f.close()
+        raise ValueError("Not a StudyMood recording")
+    metadata = json.loads(f.read(info_len).decode("utf-8"))
+    metadata["created_ns"] = created_ns
+
+    def records():
+        with f:
+            while True:
+                head = f.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return  # end of file, or a record cut off by a crash
+                kind, t, length = _RECORD.unpack(head)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                yield kind, t, payload
+
+    return metadata, records()
+
+
+def replay_session(path, backend=None, realtime=False, detector=None):
+    """Run a recording through MoodDetector, FocusLogger and TaskRecommender.
+
+    Returns the replayed samples, the samples recorded live, the suggestions
+    (sample index, text) and a LatencyHistogram per stage. The same recording
+    and backend always give the same samples.
+    """
+    import cv2
+
+    from src.focus import FocusLogger
+    from src.mood import MoodDetector
+    from src.recommender import TaskRecommender
+
+    metadata, records = read_recording(path)
+    if detector is None:
+        detector = MoodDetector(tracking=True, backend=backend or metadata.get("backend"))
+    focus_logger = FocusLogger(listen=False)
+    recommender = TaskRecommender()
+    samples, recorded = SampleStore(), SampleStore()
+    suggestions = []
+    stages = {name: LatencyHistogram() for name in ("read", "decode", "detect", "focus", "recommend")}
+    mood, face_focus = "Neutral", 0.5
+    last_suggestion = None
+    t = 0.0
+    # A simulated activity score can't be recomputed, so replay the recorded one
+    simulated_focus = metadata.get("simulated_focus", False)
+
+    start = time.perf_counter()
+    read_start = start
+    for kind, t, payload in records:
+        stages["read"].record(time.perf_counter() - read_start)
+        if realtime:
+            delay = start + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        if kind == FRAME:
+            stage_start = time.perf_counter()
+            frame = None
+            if payload:
+                frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+            decoded = time.perf_counter()
+            mood, face_focus = detector.detect_mood(frame)
+            stages["decode"].record(decoded - stage_start)
+            stages["detect"].record(time.perf_counter() - decoded)
+        elif kind == EVENT:
+            focus_logger.record_event(payload[0], t)
+        elif kind == TICK:
+            timestamp_ns, _, recorded_activity, recorded_focus = _TICK.unpack_from(payload)
+            recorded.append(timestamp_ns, payload[_TICK.size:].decode("utf-8"), recorded_focus)
+
+            stage_start = time.perf_counter()
+            if simulated_focus:
+                activity_focus = recorded_activity
+            else:
+                activity_focus = focus_logger.get_focus_score(now=t)
+            focus = round(face_focus * 0.6 + activity_focus * 0.4, 2)
+            stages["focus"].record(time.perf_counter() - stage_start)
+            samples.append(timestamp_ns, mood, focus)
+
+            stage_start = time.perf_counter()
+            recommender.update(timestamp_ns, mood, focus)
+            if last_suggestion is None or t - last_suggestion >= SUGGESTION_INTERVAL:
+                suggestions.append((len(samples) - 1, recommender.recommend()))
+                last_suggestion = t
+            stages["recommend"].record(time.perf_counter() - stage_start)
+        read_start = time.perf_counter()
+
+    return {
+        "metadata": metadata,
+        "samples": samples,
+        "recorded": recorded,
+        "suggestions": suggestions,
+        "stages": stages,
+        "seconds": time.perf_counter() - start,
+        "duration": t,
+        "backend": detector.backend_name,
+    }
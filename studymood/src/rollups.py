@@ -0,0 +1,97 @@
+from collections import deque
+
+import numpy as np
+
+# (bucket width in seconds, buckets kept): 6 hours, 2 days and 30 days
+TIERS = ((10, 2160), (60, 2880), (600, 4320))
+
+
+class _Tier:
+    def __init__(self, width, keep):
+        self.width_ns = width * 1_000_000_000
+        self.buckets = deque(maxlen=keep)  # [start_ns, min, sum, max, count]
+
+    def add(self, timestamp_ns, value):
+        start = timestamp_ns - timestamp_ns % self.width_ns
+        if self.buckets and self.buckets[-1][0] == start:
+            bucket = self.buckets[-1]
+            bucket[1] = min(bucket[1], value)
+            bucket[2] += value
+            bucket[3] = max(bucket[3], value)
+            bucket[4] += 1
+        else:
+            self.buckets.append([start, value, value, value, 1])
+
+    def oldest(self):
+        return self.buckets[0][0] if self.buckets else None
+
+    def arrays(self):
+        data = np.array(self.buckets, dtype=np.float64).reshape(-1, 5)
+        # Plot each bucket at its midpoint
+        timestamps = data[:, 0].astype(np.int64) + self.width_ns // 2
+        return timestamps, data[:, 1], data[:, 2] / data[:, 4], data[:, 3]
+
+
+class RollupSeries:
+    """Raw samples for the last few minutes plus bounded min/mean/max tiers."""
+
+    def __init__(self, raw_seconds=600, tiers=TIERS):
+        self.raw_ns = raw_seconds * 1_000_000_000
+        self.raw = deque()
+        self.tiers = [_Tier(width, keep) for width, keep in tiers]
+        self.first_ts = None
+
+    def add(self, timestamp_ns, value):
+        if self.first_ts is None:
+            self.first_ts = timestamp_ns
+        self.raw.append((timestamp_ns, value))
+        while self.raw[0][0] < timestamp_ns - self.raw_ns:
+            self.raw.popleft()
+        for tier in self.tiers:
+            tier.add(timestamp_ns, value)
+
+    def __len__(self):
+        return len(self.raw) + sum(len(tier.buckets) for tier in self.tiers)
+
+    def series(self, max_points=500):
+        """Return (timestamps_ns, values) for the whole span in at most max_points."""
+        if self.first_ts is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Use the finest resolution that still reaches back to the first sample
+        if self.raw[0][0] <= self.first_ts:
+            data = np.array(self.raw, dtype=np.float64)
+            timestamps, values = data[:, 0].astype(np.int64), data[:, 1]
+        else:
+            tier = next((t for t in self.tiers if t.oldest() <= self.first_ts), self.tiers[-1])
+            timestamps, _, values, _ = tier.arrays()
+        return lttb(timestamps, values, max_points)
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets downsampling; keeps peaks and dips visible."""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return x, y
+
+    xf = np.asarray(x, dtype=np.float64)
+    yf = np.asarray(y, dtype=np.float64)
+    # Bucket edges for the points between the fixed first and last one
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[next_start:next_end].mean()
+        avg_y = yf[next_start:next_end].mean()
+
+        areas = np.abs((xf[a] - avg_x) * (yf[start:end] - yf[a]) -
+                       (xf[a] - xf[start:end]) * (avg_y - yf[a]))
+        a = start + int(areas.argmax())
+        keep[i + 1] = a
+    return np.asarray(x)[keep], np.asarray(y)[keep]
@@ -0,0 +1,90 @@
+import time
+
+
+class Stage:
+    def __init__(self, name, period, adaptive=False, budget=0.5, max_period=None):
+        self.name = name
+        self.target_period = period
+        self.period = period
+        self.adaptive = adaptive
+        self.budget = budget  # share of the period the stage may spend working
+        self.max_period = max_period or period * 8
+        self.next_deadline = 0.0
+        self.last_start = None
+        self.cost = None  # EWMA of run time, seconds
+        self.interval = None  # EWMA of time between runs, seconds
+        self.runs = 0
+        self.overruns = 0
+
+
+class DeadlineScheduler:
+    """Runs stages against absolute deadlines and backs off stages that overrun."""
+
+    def __init__(self, clock=time.monotonic, smoothing=0.2):
+        self.clock = clock
+        self.smoothing = smoothing
+        self.stages = {}
+
+    def add_stage(self, name, period, adaptive=False, budget=0.5, max_period=None):
+        stage = Stage(name, period, adaptive, budget, max_period)
+        stage.next_deadline = self.clock()
+        self.stages[name] = stage
+        return stage
+
+    def due(self, name, now=None):
+        now = self.clock() if now is None else now
+        return now >= self.stages[name].next_deadline
+
+    def run(self, name, fn, *args):
+        start = self.clock()
+        try:
+            return fn(*args)
+        finally:
+            self.record(name, start, self.clock())
+
+    def record(self, name, start, end):
+        stage = self.stages[name]
+        a = self.smoothing
+        cost = end - start
+        stage.cost = cost if stage.cost is None else (1 - a) * stage.cost + a * cost
+        if stage.last_start is not None:
+            interval = start - stage.last_start
+            stage.interval = interval if stage.interval is None else (1 - a) * stage.interval + a * interval
+        stage.last_start = start
+        stage.runs += 1
+
+        if stage.adaptive:
+            load = stage.cost / stage.period
+            if load > stage.budget:
+                stage.period = min(stage.period * 1.25, stage.max_period)
+            elif load < stage.budget / 2 and stage.period > stage.target_period:
+                stage.period = max(stage.period / 1.1, stage.target_period)
+
+        # Next deadline is absolute so the period doesn't drift by the work time;
+        # if we fell a whole period behind, skip ahead instead of bursting
+        stage.next_deadline += stage.period
+        if stage.next_deadline < end:
+            stage.overruns += 1
+            stage.next_deadline = end + stage.period
+
+    def time_until_next(self, now=None):
+        now = self.clock() if now is None else now
+        if not self.stages:
+            return 0.0
+        return max(0.0, min(stage.next_deadline for stage in self.stages.values()) - now)
+
+    def sleep_until_next(self):
+        time.sleep(self.time_until_next())
+
+    def rates(self):
+        """Target, currently allowed and achieved rates (Hz) per stage, plus cost in ms."""
+        return {
+            name: {
+                "target_hz": 1.0 / stage.target_period,
+                "allowed_hz": 1.0 / stage.period,
+                "achieved_hz": 1.0 / stage.interval if stage.interval else 0.0,
+                "cost_ms": (stage.cost or 0.0) * 1000,
+                "overruns": stage.overruns,
+            }
+            for name, stage in self.stages.items()
+        }
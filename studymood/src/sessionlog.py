@@ -0,0 +1,191 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from src.store import MOOD_LABELS, SampleStore
+
+# Segment layout: a fixed 256-byte header followed by 16-byte records
+MAGIC = b"SMLOG\x00\x00\x01"
+VERSION = 1
+HEADER_SIZE = 256
+_HEADER = struct.Struct("<8sIIqH")
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("focus", "<f4"),
+    ("mood", "u1"),
+    ("pad", "u1", (3,)),
+])
+LOG_SUFFIX = ".smlog"
+
+
+def _pack_header(created_ns, labels):
+    names = "\n".join(labels).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, created_ns, len(names)) + names
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many mood labels for the log header")
+    return header.ljust(HEADER_SIZE, b"\x00")
+
+
+def open_new(path, buffering=-1):
+    """Create path exclusively, adding -1, -2... before the extension if it's taken.
+
+    Paths have one-second resolution, so two sessions started together would
+    otherwise truncate each other's file. Returns (file, path actually used).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    base, ext = os.path.splitext(path)
+    candidate = path
+    for n in range(1, 1000):
+        try:
+            return open(candidate, "xb", buffering=buffering), candidate
+        except FileExistsError:
+            candidate = f"{base}-{n}{ext}"
+    raise FileExistsError(f"no free file name for {path}")
+
+
+def _unpack_header(data):
+    if len(data) < _HEADER.size:
+        raise ValueError("Not a StudyMood session log")
+    magic, version, record_size, created_ns, names_len = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError("Not a StudyMood session log")
+    names = data[_HEADER.size:_HEADER.size + names_len].decode("utf-8")
+    return created_ns, names.split("\n") if names else []
+
+
+class SessionLogWriter:
+    """Append-only session log; appends are queued and written on a background thread."""
+
+    def __init__(self, path, labels=None, fsync_interval=2.0):
+        self.path = path
+        self.labels = list(labels or MOOD_LABELS)
+        self._codes = {label: code for code, label in enumerate(self.labels)}
+        self.fsync_interval = fsync_interval
+        self.created_ns = time.time_ns()
+        self.records_written = 0
+        self._queue = queue.SimpleQueue()
+
+        self._file, self.path = open_new(path, buffering=64 * 1024)
+        self._file.write(_pack_header(self.created_ns, self.labels))
+        # Readers skip files without a complete header, so don't leave it in the buffer
+        self._file.flush()
+        self._thread = threading.Thread(target=self._run, name="SessionLogWriter", daemon=True)
+        self._thread.start()
+
+    def append(self, timestamp_ns, mood, focus):
+        # Never blocks the caller; the writer thread does the I/O
+        self._queue.put((timestamp_ns, mood, focus))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        last_sync = time.monotonic()
+        closing = False
+        while not closing:
+            try:
+                batch = [self._queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                closing = True
+                batch = batch[:batch.index(None)]
+
+            if batch:
+                self._write(batch)
+            if closing or time.monotonic() - last_sync >= self.fsync_interval:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                last_sync = time.monotonic()
+        self._file.close()
+
+    def _write(self, batch):
+        records = np.zeros(len(batch), dtype=RECORD_DTYPE)
+        new_label = False
+        for i, (timestamp_ns, mood, focus) in enumerate(batch):
+            code = self._codes.get(mood)
+            if code is None:
+                code = len(self.labels)
+                self.labels.append(mood)
+                self._codes[mood] = code
+                new_label = True
+            records[i] = (timestamp_ns, focus, code, 0)
+        self._file.write(records.tobytes())
+        self.records_written += len(batch)
+
+        if new_label:
+            # Rewrite the header in place so readers can decode the new code
+            self._file.flush()
+            self._file.seek(0)
+            self._file.write(_pack_header(self.created_ns, self.labels))
+            self._file.seek(0, os.SEEK_END)
+
+
+def open_log(path):
+    """Memory-map a session log; returns (labels, records) without reading the records."""
+    with open(path, "rb") as f:
+        created_ns, labels = _unpack_header(f.read(HEADER_SIZE))
+    # Ignore a partially written trailing record
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return labels, np.empty(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return labels, records
+
+
+def list_logs(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith(LOG_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def new_log_path(directory, prefix="session"):
+    return os.path.join(directory, time.strftime(f"{prefix}-%Y%m%d-%H%M%S") + LOG_SUFFIX)
+
+
+def load_history(directory, since_ns=None):
+    """Load every session log in a directory into one time-ordered SampleStore.
+
+    Tabs share the hub's samples, so two tabs running a session log the same
+    records; samples with the same timestamp are kept once.
+    """
+    store = SampleStore(capacity=1)
+    parts = []
+    for path in list_logs(directory):
+        try:
+            labels, records = open_log(path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping session log {path}: {e}")
+            continue
+        if since_ns is not None and len(records) > 0:
+            records = records[records["timestamp"] >= since_ns]
+        if len(records) == 0:
+            continue
+        # Map this file's mood codes onto the combined store's codes
+        remap = np.array([store.mood_code(label) for label in labels] or [0], dtype=np.uint8)
+        codes = np.minimum(records["mood"], len(remap) - 1)
+        parts.append((records["timestamp"], remap[codes], records["focus"]))
+
+    if parts:
+        timestamps = np.concatenate([p[0] for p in parts])
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        keep = np.concatenate(([True], np.diff(timestamps) != 0))
+        store = SampleStore.from_arrays(
+            timestamps[keep],
+            np.concatenate([p[1] for p in parts])[order][keep],
+            np.concatenate([p[2] for p in parts])[order][keep],
+            labels=store.labels,
+        )
+    return store
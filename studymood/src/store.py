@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import numpy as np
+
+MOOD_LABELS = ["Neutral", "Happy", "Serious", "Focused", "Sad"]
+
+
+def local_index(timestamps):
+    """DatetimeIndex in local time for an array of epoch-ns timestamps."""
+    import pandas as pd
+
+    index = pd.to_datetime(timestamps, unit="ns", utc=True)
+    return index.tz_convert(datetime.now().astimezone().tzinfo)
+
+
+class SampleStore:
+    """Columnar session samples backed by growable NumPy arrays.
+
+    Timestamps are int64 epoch nanoseconds, moods are uint8 codes into
+    ``labels`` and focus is float32, about 13 bytes per sample.
+    """
+
+    def __init__(self, capacity=4096, labels=None):
+        self.labels = list(labels or MOOD_LABELS)
+        self._codes = {label: code for code, label in enumerate(self.labels)}
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._moods = np.empty(capacity, dtype=np.uint8)
+        self._focus = np.empty(capacity, dtype=np.float32)
+        self.size = 0
+
+    @classmethod
+    def from_arrays(cls, timestamps, moods, focus, labels=None):
+        """Wrap existing arrays (e.g. memory-mapped columns) without copying them."""
+        store = cls(capacity=0, labels=labels)
+        store._timestamps = np.asarray(timestamps, dtype=np.int64)
+        store._moods = np.asarray(moods, dtype=np.uint8)
+        store._focus = np.asarray(focus, dtype=np.float32)
+        store.size = len(store._timestamps)
+        return store
+
+    def __len__(self):
+        return self.size
+
+    def mood_code(self, mood):
+        code = self._codes.get(mood)
+        if code is None:
+            code = len(self.labels)
+            if code > 255:
+                raise ValueError("Too many distinct moods for a uint8 code")
+            self.labels.append(mood)
+            self._codes[mood] = code
+        return code
+
+    def append(self, timestamp_ns, mood, focus):
+        if self.size == len(self._timestamps):
+            self._grow(max(2 * self.size, 1024))
+        i = self.size
+        self._timestamps[i] = timestamp_ns
+        self._moods[i] = self.mood_code(mood)
+        self._focus[i] = focus
+        self.size = i + 1
+
+    def _grow(self, capacity):
+        for name in ("_timestamps", "_moods", "_focus"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # Views over the filled part of the arrays, no copies
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.size]
+
+    @property
+    def moods(self):
+        return self._moods[:self.size]
+
+    @property
+    def focus(self):
+        return self._focus[:self.size]
+
+    def last(self):
+        if self.size == 0:
+            return None
+        i = self.size - 1
+        return int(self._timestamps[i]), self.labels[self._moods[i]], float(self._focus[i])
+
+    def mood_counts(self):
+        counts = np.bincount(self.moods, minlength=len(self.labels))
+        return {label: int(count) for label, count in zip(self.labels, counts) if count > 0}
+
+    def to_frame(self):
+        """DataFrame view with a local-time index, a categorical mood and focus."""
+        import pandas as pd
+
+        moods = pd.Categorical.from_codes(self.moods, categories=self.labels)
+        return pd.DataFrame({"mood": moods, "focus": self.focus}, index=local_index(self.timestamps), copy=False)
+
+
+def merge_stores(stores):
+    """One time-ordered SampleStore from several, with their mood codes unified."""
+    merged = SampleStore(capacity=1)
+    parts = []
+    for store in stores:
+        if len(store) == 0:
+            continue
+        remap = np.array([merged.mood_code(label) for label in store.labels], dtype=np.uint8)
+        parts.append((store.timestamps, remap[store.moods], store.focus))
+    if not parts:
+        return merged
+
+    timestamps = np.concatenate([p[0] for p in parts])
+    order = np.argsort(timestamps, kind="stable")
+    return SampleStore.from_arrays(
+        timestamps[order],
+        np.concatenate([p[1] for p in parts])[order],
+        np.concatenate([p[2] for p in parts])[order],
+        labels=merged.labels,
+    )
@@ -0,0 +1,33 @@
+from src.perf import PERF
+
+
+class ViewModel:
+    """Remembers what each Dashboard placeholder shows and skips re-sending it unchanged.
+
+    Streamlit sends every placeholder write to the browser, which re-renders
+    the element even when nothing changed. Build one per script run, since a
+    rerun starts with empty placeholders.
+    """
+
+    def __init__(self):
+        self._shown = {}
+        self.pushed = 0
+        self.suppressed = 0
+
+    def markdown(self, name, placeholder, body):
+        return self._push(name, body, placeholder.markdown, unsafe_allow_html=True)
+
+    def caption(self, name, placeholder, body):
+        return self._push(name, body, placeholder.caption)
+
+    def _push(self, name, body, draw, **kwargs):
+        """Draw body unless it's what the placeholder already shows; True if it was sent."""
+        if self._shown.get(name) == body:
+            self.suppressed += 1
+            PERF.count("ui.updates_suppressed")
+            return False
+        draw(body, **kwargs)
+        self._shown[name] = body
+        self.pushed += 1
+        PERF.count("ui.updates_pushed")
+        return True
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Modules are imported as src.*, like app.py does from studymood/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.store import SampleStore  # noqa: E402
+
+MOODS = ["Happy", "Serious", "Neutral", "Sad", "Tired"]
+
+
+@pytest.fixture
+def make_samples():
+    """SampleStore(n) of 2 Hz samples with pauses and low-focus runs; seeded."""
+    def make(n, seed=0):
+        rng = np.random.default_rng(seed)
+        gaps = rng.choice([0.5, 3.0, 200.0, 4000.0], size=n, p=[0.9695, 0.03, 0.0003, 0.0002])
+        timestamps = 1_700_000_000 * 10**9 + (np.cumsum(gaps) * 1e9).astype(np.int64)
+        # Focus wanders (reflected at 0 and 1) and moods stick for a while, so
+        # windows see slopes, long low stretches and mood majorities
+        focus = np.abs(0.6 + np.cumsum(rng.normal(0, 0.03, size=n)))
+        focus = 1.0 - np.abs(1.0 - focus % 2.0)
+        moods = np.cumsum(rng.random(n) < 0.005) % len(MOODS)
+        samples = SampleStore()
+        for t, code, f in zip(timestamps, moods, focus):
+            samples.append(int(t), MOODS[code], round(float(f), 2))
+        return samples
+    return make
@@ -0,0 +1,45 @@
+import pytest
+
+from src.aggregates import SessionAggregates
+
+
+def assert_same(a, b):
+    assert a.count == b.count
+    assert a.mood_counts == b.mood_counts
+    assert a.time_in_mood.keys() == b.time_in_mood.keys()
+    for mood, seconds in a.time_in_mood.items():
+        assert b.time_in_mood[mood] == pytest.approx(seconds)
+    for name in ("focus_mean", "focus_max", "focus_std", "current_streak", "longest_streak"):
+        assert getattr(b, name) == pytest.approx(getattr(a, name)), name
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_from_store_matches_update(make_samples, seed):
+    samples = make_samples(3000, seed=seed)
+    running = SessionAggregates()
+    for t, code, focus in zip(samples.timestamps, samples.moods, samples.focus):
+        running.update(int(t), samples.labels[code], float(focus))
+    assert_same(running, SessionAggregates.from_store(samples))
+
+
+def test_gaps_are_capped_and_end_streaks():
+    agg = SessionAggregates(max_gap=5.0)
+    agg.update(0, "Happy", 0.9)
+    agg.update(10**9, "Happy", 0.9)
+    agg.update(3600 * 10**9, "Sad", 0.9)  # back an hour later
+    assert agg.time_in_mood == {"Happy": 6.0}
+    assert agg.current_streak == 0.0
+    assert agg.longest_streak == 1.0
+
+
+def test_merge_matches_whole(make_samples):
+    samples = make_samples(1000, seed=7)
+    parts = [SessionAggregates(), SessionAggregates()]
+    for i, (t, code, focus) in enumerate(zip(samples.timestamps, samples.moods, samples.focus)):
+        parts[i % 2].update(int(t), samples.labels[code], float(focus))
+    merged = SessionAggregates.merge(parts)
+    whole = SessionAggregates.from_store(samples)
+    assert merged.count == whole.count
+    assert merged.mood_counts == whole.mood_counts
+    assert merged.focus_mean == pytest.approx(whole.focus_mean)
+    assert merged.focus_std == pytest.approx(whole.focus_std)
@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pytest
+
+from src.export import export_session, parquet_available, read_session, session_bytes
+from src.store import SampleStore
+
+FORMATS = ["npz", pytest.param("parquet", marks=pytest.mark.skipif(not parquet_available(), reason="needs pyarrow"))]
+
+
+def assert_same_samples(a, b):
+    assert len(a) == len(b)
+    np.testing.assert_array_equal(a.timestamps, b.timestamps)
+    np.testing.assert_array_equal(a.focus, b.focus)
+    assert [a.labels[code] for code in a.moods] == [b.labels[code] for code in b.moods]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(tmp_path, make_samples, fmt):
+    samples = make_samples(10000, seed=5)
+    path = str(tmp_path / f"session.{fmt}")
+    # A small chunk size makes the writers go through several chunks
+    export_session(samples, path, fmt, chunk_size=777)
+    assert_same_samples(samples, read_session(path))
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip_in_memory(make_samples, fmt):
+    samples = make_samples(100, seed=6)
+    assert_same_samples(samples, read_session(io.BytesIO(session_bytes(samples, fmt)), fmt))
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_empty_session(tmp_path, fmt):
+    path = str(tmp_path / f"empty.{fmt}")
+    export_session(SampleStore(), path, fmt)
+    assert len(read_session(path)) == 0
+
+
+def test_npz_opens_with_numpy(tmp_path, make_samples):
+    samples = make_samples(100)
+    path = str(tmp_path / "session.npz")
+    export_session(samples, path, "npz")
+    with np.load(path) as data:
+        np.testing.assert_array_equal(data["timestamp"], samples.timestamps)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.recommender import TaskRecommender
+from src.store import SampleStore
+
+
+def assert_replay_matches(samples):
+    recommender = TaskRecommender()
+    suggestions = recommender.suggestions()
+    chosen = TaskRecommender().replay(samples)
+
+    labels = samples.labels
+    for i, (t, code, focus) in enumerate(zip(samples.timestamps, samples.moods, samples.focus)):
+        recommender.update(int(t), labels[code], float(focus))
+        assert suggestions[chosen[i]] == recommender.recommend(), f"sample {i}"
+    return chosen
+
+
+def test_replay_matches_update_and_recommend(make_samples):
+    chosen = assert_replay_matches(make_samples(20000, seed=1))
+    # Most rules should have fired for the check to mean anything
+    assert np.count_nonzero(np.bincount(chosen)) >= 5
+
+
+def test_replay_matches_without_breaks():
+    # An hour and a half of steady work reaches the overdue-break rule
+    rng = np.random.default_rng(8)
+    samples = SampleStore()
+    for i in range(11000):
+        samples.append(1_700_000_000 * 10**9 + i * 500_000_000, "Serious", round(float(rng.uniform(0.45, 0.65)), 2))
+    chosen = assert_replay_matches(samples)
+    assert 1 in chosen
+
+
+def test_replay_empty():
+    assert len(TaskRecommender().replay(SampleStore())) == 0
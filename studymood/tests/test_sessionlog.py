@@ -0,0 +1,52 @@
+import numpy as np
+
+from src.sessionlog import SessionLogWriter, list_logs, load_history, open_log
+
+
+def write_log(path, samples):
+    writer = SessionLogWriter(path)
+    for t, code, focus in zip(samples.timestamps, samples.moods, samples.focus):
+        writer.append(int(t), samples.labels[code], float(focus))
+    writer.close()
+    return writer.path
+
+
+def test_write_read_cycle(tmp_path, make_samples):
+    samples = make_samples(5000, seed=2)
+    path = write_log(str(tmp_path / "a.smlog"), samples)
+
+    labels, records = open_log(path)
+    assert len(records) == len(samples)
+    np.testing.assert_array_equal(records["timestamp"], samples.timestamps)
+    np.testing.assert_array_equal(records["focus"], samples.focus)
+    moods = [labels[code] for code in records["mood"]]
+    assert moods == [samples.labels[code] for code in samples.moods]
+
+
+def test_existing_log_is_not_overwritten(tmp_path, make_samples):
+    samples = make_samples(10)
+    first = write_log(str(tmp_path / "s.smlog"), samples)
+    second = write_log(str(tmp_path / "s.smlog"), samples)
+    assert first != second
+    assert len(list_logs(str(tmp_path))) == 2
+
+
+def test_empty_log_has_header(tmp_path):
+    writer = SessionLogWriter(str(tmp_path / "empty.smlog"))
+    labels, records = open_log(writer.path)
+    writer.close()
+    assert len(records) == 0 and labels
+
+
+def test_history_is_sorted_and_deduplicated(tmp_path, make_samples):
+    samples = make_samples(400, seed=3)
+    # Two tabs logging the same hub samples, and a session that overlaps them
+    write_log(str(tmp_path / "tab1.smlog"), samples)
+    write_log(str(tmp_path / "tab2.smlog"), samples)
+    other = make_samples(50, seed=4)
+    write_log(str(tmp_path / "other.smlog"), other)
+
+    history = load_history(str(tmp_path))
+    assert np.all(np.diff(history.timestamps) > 0)
+    expected = np.union1d(samples.timestamps, other.timestamps)
+    np.testing.assert_array_equal(history.timestamps, expected)